@@ -1,21 +1,68 @@
-﻿from sqlalchemy import create_engine
+﻿from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
+from .engine import build_async_engine, build_engine
+from ..utils.cache import LRUTTLCache
+
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./kitchen_management.db")
+# Optional replica for analytics reads; unset means reads go to the primary too
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL")
+# After a client writes, its reads stay on the primary this long so it sees its own data
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+def to_async_url(url: str) -> str:
+    # DATABASE_URL stays a plain sync URL (alembic, CLI jobs); the app swaps in the async driver
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername)).render_as_string(hide_password=False)
 
-engine = create_engine(DATABASE_URL)
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+
+# Sync stack for scripts and migrations
+engine = build_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = build_async_engine(ASYNC_DATABASE_URL)
+# Objects stay readable after commit without an implicit (and, under asyncio, illegal) lazy refresh
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+if DATABASE_READ_URL:
+    read_async_engine = build_async_engine(to_async_url(DATABASE_READ_URL), name="replica_async")
+    AsyncReadSessionLocal = async_sessionmaker(read_async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+else:
+    read_async_engine = async_engine
+    AsyncReadSessionLocal = AsyncSessionLocal
+
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+recent_writers = LRUTTLCache(maxsize=10000, ttl=READ_YOUR_WRITES_SECONDS)
+
+def client_key(request: Request) -> str:
+    # Until requests carry a user, the bearer token (or the client address) stands in for one
+    return request.headers.get("authorization") or (request.client.host if request.client else "")
+
+@event.listens_for(Session, "after_commit")
+def _remember_writer(session):
+    # Services only commit when they wrote something
+    writer = session.info.get("writer")
+    if writer is not None:
+        recent_writers.set(writer, True)
+
+async def get_db(request: Request):
+    async with AsyncSessionLocal() as db:
+        db.info["writer"] = client_key(request)
+        yield db
+
+async def get_read_db(request: Request):
+    factory = AsyncSessionLocal if recent_writers.get(client_key(request)) else AsyncReadSessionLocal
+    async with factory() as db:
         yield db
-    finally:
-        db.close()
@@ -0,0 +1,120 @@
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from typing import Dict, Optional
+import logging
+import os
+import re
+import threading
+import time
+
+# A statement shape seen more often than this within one request is reported as a likely N+1
+SQL_REPEAT_THRESHOLD = int(os.getenv("SQL_REPEAT_THRESHOLD", "10"))
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+_PARAM_LIST = re.compile(r"\((?:\s*(?:\?|%s|%\(\w+\)s|\$\d+|:\w+)\s*,)+\s*(?:\?|%s|%\(\w+\)s|\$\d+|:\w+)\s*\)")
+
+def statement_shape(statement: str) -> str:
+    # Expanded IN lists differ in length from call to call; fold them so the shapes compare equal
+    return _PARAM_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+class RequestQueries:
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement = None
+        self.shapes = Counter()
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.total_time += seconds
+        if seconds > self.slowest_time:
+            self.slowest_time = seconds
+            self.slowest_statement = statement
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold: int = None):
+        threshold = SQL_REPEAT_THRESHOLD if threshold is None else threshold
+        shape, count = self.shapes.most_common(1)[0] if self.shapes else (None, 0)
+        return (shape, count) if count > threshold else (None, 0)
+
+# Set per request by the middleware. SQLAlchemy's asyncio greenlets inherit the caller's
+# context, so statements issued under AsyncSession.run_sync land here too.
+current_queries: ContextVar[Optional[RequestQueries]] = ContextVar("current_queries", default=None)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started_at"].pop()
+    queries = current_queries.get()
+    if queries is not None:
+        queries.record(statement, time.perf_counter() - started)
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute; drop its start time
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started_at"):
+        connection.info["query_started_at"].pop()
+
+def instrument(engine: Engine):
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+class RouteQueryStats:
+    def __init__(self):
+        self._routes = defaultdict(lambda: {
+            "requests": 0,
+            "queries": 0,
+            "db_time": 0.0,
+            "max_queries": 0,
+            "slowest_ms": 0.0,
+            "slowest_statement": None,
+            "repeated_statement_requests": 0,
+            "repeated_statement": None
+        })
+        self._lock = threading.Lock()
+
+    def record(self, route: str, queries: RequestQueries):
+        shape, repeats = queries.repeated()
+        if shape:
+            logger.warning("possible N+1 on %s: %d executions of %s", route, repeats, shape)
+        with self._lock:
+            stats = self._routes[route]
+            stats["requests"] += 1
+            stats["queries"] += queries.count
+            stats["db_time"] += queries.total_time
+            stats["max_queries"] = max(stats["max_queries"], queries.count)
+            if queries.slowest_time * 1000 > stats["slowest_ms"]:
+                stats["slowest_ms"] = queries.slowest_time * 1000
+                stats["slowest_statement"] = queries.slowest_statement
+            if shape:
+                stats["repeated_statement_requests"] += 1
+                stats["repeated_statement"] = {"statement": shape, "count": repeats}
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                route: {
+                    "requests": s["requests"],
+                    "avg_queries": s["queries"] / s["requests"],
+                    "max_queries": s["max_queries"],
+                    "avg_db_ms": s["db_time"] / s["requests"] * 1000,
+                    "slowest_ms": s["slowest_ms"],
+                    "slowest_statement": s["slowest_statement"],
+                    "repeated_statement_requests": s["repeated_statement_requests"],
+                    "repeated_statement": s["repeated_statement"]
+                }
+                for route, s in sorted(self._routes.items())
+            }
+
+    def clear(self):
+        with self._lock:
+            self._routes.clear()
+
+route_query_stats = RouteQueryStats()
@@ -0,0 +1,60 @@
+from sqlalchemy.engine import make_url
+from ..utils.cache import data_versions
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+
+# Local stand-in for streaming replication: copy the primary SQLite file onto DATABASE_READ_URL
+REPLICA_SYNC_INTERVAL_SECONDS = float(os.getenv("REPLICA_SYNC_INTERVAL_SECONDS", "5"))
+REPLICA_SYNC_PAGES_PER_STEP = int(os.getenv("REPLICA_SYNC_PAGES_PER_STEP", "1024"))
+
+logger = logging.getLogger(__name__)
+
+def sqlite_path(url: str) -> str:
+    url = make_url(url)
+    if url.get_backend_name() != "sqlite" or url.database in (None, "", ":memory:"):
+        raise ValueError(f"replica sync needs file-backed SQLite URLs, got {url}")
+    return url.database
+
+def sync_once(primary_url: str, replica_url: str) -> float:
+    # The online backup API copies a consistent snapshot while the primary keeps taking writes;
+    # replica readers are only blocked for the final step of each pass
+    started = time.perf_counter()
+    source = sqlite3.connect(sqlite_path(primary_url))
+    target = sqlite3.connect(sqlite_path(replica_url), timeout=30)
+    try:
+        source.backup(target, pages=REPLICA_SYNC_PAGES_PER_STEP)
+    finally:
+        target.close()
+        source.close()
+    return time.perf_counter() - started
+
+async def replica_sync_loop(primary_url: str, replica_url: str, interval: float = REPLICA_SYNC_INTERVAL_SECONDS,
+                            invalidate: bool = True):
+    # Data versions live in the web process's memory, so invalidate only means something when this
+    # runs inside it (REPLICA_SYNC_IN_PROCESS); run standalone, cached payloads age out by their TTL
+    while True:
+        try:
+            await asyncio.to_thread(sync_once, primary_url, replica_url)
+        except (sqlite3.Error, OSError):
+            # Usually a locked file; the next pass copies whatever this one missed
+            logger.exception("replica sync failed")
+        else:
+            if invalidate:
+                # Payloads cached from the lagging copy are now stale, whatever restaurant they belong to
+                data_versions.bump_all()
+        await asyncio.sleep(interval)
+
+if __name__ == "__main__":
+    # python -m app.database.replica_sync [--once]
+    import sys
+    from .database import DATABASE_READ_URL, DATABASE_URL
+
+    if not DATABASE_READ_URL:
+        sys.exit("DATABASE_READ_URL is not set")
+    if "--once" in sys.argv:
+        print(f"replica synced in {sync_once(DATABASE_URL, DATABASE_READ_URL):.3f}s")
+    else:
+        asyncio.run(replica_sync_loop(DATABASE_URL, DATABASE_READ_URL, invalidate=False))
@@ -0,0 +1,98 @@
+from contextlib import asynccontextmanager, suppress
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from .database.database import DATABASE_READ_URL, DATABASE_URL, AsyncSessionLocal, async_engine, engine, read_async_engine
+from .database.replica_sync import replica_sync_loop
+from .middleware.auth_middleware import AuthMiddleware
+from .middleware.idempotency_middleware import IdempotencyMiddleware
+from .middleware.query_stats_middleware import QueryStatsMiddleware
+from .middleware.rate_limit_middleware import AdmissionControlMiddleware
+from .models.restaurants.restaurant import Base
+# Every mapped class has to be imported before the relationships resolve or create_all runs
+from .models.chef_training import training
+from .models.food_quality import models
+from .models.idempotency import idempotency
+from .models.jobs import job
+from .models.sync import change_log
+from .models.tasks import task
+from .models.users import user
+from .routes.analytics import ai_routes, food_quality_routes, reports_routes
+from .routes.auth import auth_routes
+from .routes.jobs import job_routes
+from .routes.live import live_routes
+from .routes.metrics import metrics_routes
+from .routes.restaurants import restaurant_routes
+from .routes.sync import sync_routes
+from .routes.web import web_routes
+from .services.food_quality.write_buffer import WRITE_BEHIND_ENABLED, write_buffer
+from .services.idempotency.idempotency_service import purge_expired_loop
+from .services.jobs.job_runner import job_runner
+from .services.live.live_service import refresh_aggregates_loop
+import asyncio
+import os
+
+CORS_ORIGINS = [origin.strip() for origin in os.getenv("CORS_ORIGINS", "*").split(",") if origin.strip()]
+# Fresh SQLite deployments have no schema yet; migrations only add indexes on top of it
+CREATE_TABLES_ON_STARTUP = os.getenv("CREATE_TABLES_ON_STARTUP", "false").lower() in ("1", "true", "yes")
+# Copy the primary onto DATABASE_READ_URL from this process instead of running replica_sync separately
+REPLICA_SYNC_IN_PROCESS = os.getenv("REPLICA_SYNC_IN_PROCESS", "false").lower() in ("1", "true", "yes")
+
+ROUTERS = [
+    web_routes.router,
+    auth_routes.router,
+    restaurant_routes.router,
+    food_quality_routes.router,
+    reports_routes.router,
+    ai_routes.router,
+    sync_routes.router,
+    job_routes.router,
+    live_routes.router,
+    metrics_routes.router
+]
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if CREATE_TABLES_ON_STARTUP:
+        async with async_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    background = [
+        asyncio.create_task(purge_expired_loop(AsyncSessionLocal)),
+        asyncio.create_task(refresh_aggregates_loop(AsyncSessionLocal))
+    ]
+    if REPLICA_SYNC_IN_PROCESS and DATABASE_READ_URL:
+        background.append(asyncio.create_task(replica_sync_loop(DATABASE_URL, DATABASE_READ_URL)))
+    if WRITE_BEHIND_ENABLED:
+        write_buffer.start()
+    await job_runner.start()
+
+    yield
+
+    # Rows already accepted must reach the database before the engines go away
+    await write_buffer.stop()
+    # Unfinished jobs stay in the table and are picked up again on the next start
+    await job_runner.stop()
+    for bg in background:
+        bg.cancel()
+        with suppress(asyncio.CancelledError):
+            await bg
+    if read_async_engine is not async_engine:
+        await read_async_engine.dispose()
+    await async_engine.dispose()
+    engine.dispose()
+
+def create_app() -> FastAPI:
+    app = FastAPI(title="Kitchen Management API", version="1.0.0", lifespan=lifespan)
+    for router in ROUTERS:
+        app.include_router(router)
+
+    # Last added runs first: shed load before anything else, and let CORS headers reach 401s
+    app.add_middleware(IdempotencyMiddleware)
+    app.add_middleware(AuthMiddleware)
+    app.add_middleware(QueryStatsMiddleware)
+    app.add_middleware(CORSMiddleware, allow_origins=CORS_ORIGINS, allow_methods=["*"], allow_headers=["*"])
+    app.add_middleware(AdmissionControlMiddleware)
+    return app
+
+# uvicorn app.main:app --workers 1
+app = create_app()
@@ -1,27 +1,146 @@
-﻿from fastapi import Request, HTTPException
+﻿from dataclasses import dataclass
+from fastapi import Depends, Request, HTTPException
+from fastapi.responses import JSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
-from ..services.auth.auth_service import SECRET_KEY, ALGORITHM
+from typing import Iterable, Optional, Tuple
+from urllib.parse import parse_qs
+from ..database.database import AsyncSessionLocal
+from ..services.auth.auth_service import SECRET_KEY, ALGORITHM, is_active_async
+from ..utils.cache import LRUTTLCache
+import os
+import re
+import time
+
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
+
+# Regexes matched against the whole path; AUTH_PUBLIC_PATHS (comma separated) adds more
+PUBLIC_PATHS = [
+    r"/",
+    r"/docs", r"/docs/oauth2-redirect", r"/redoc", r"/openapi\.json",
+    r"/auth/token",
+    r"/api/login", r"/api/status",
+    # Counters a scraper polls; the other metrics name routes, SQL and branches and need headquarters
+    r"/metrics/cache", r"/metrics/write-buffer",
+] + [path for path in os.getenv("AUTH_PUBLIC_PATHS", "").split(",") if path]
+
+# EventSource cannot set headers, so event streams may pass the token as ?access_token=
+QUERY_TOKEN_PATHS = [r"/live(/.*)?"]
 
 security = HTTPBearer()
+# Streams may authenticate through the query string, which AuthMiddleware has already checked
+optional_security = HTTPBearer(auto_error=False)
 
-async def verify_token(credentials: HTTPAuthorizationCredentials = None):
-    if not credentials:
-        raise HTTPException(status_code=401, detail="Token required")
-    
+@dataclass(frozen=True)
+class Principal:
+    username: str
+    role: Optional[str]
+    restaurant_ids: Tuple[int, ...]
+
+    @property
+    def is_headquarters(self) -> bool:
+        return self.role == "headquarters"
+
+    def resolve_restaurant(self, requested: Optional[int]) -> Optional[int]:
+        # Headquarters may ask for any branch or the whole chain (None). Everyone else is pinned
+        # to their own branches, so a scoped query can never reach another branch's rows.
+        if self.is_headquarters:
+            return requested
+        if requested is None:
+            if len(self.restaurant_ids) == 1:
+                return self.restaurant_ids[0]
+            if not self.restaurant_ids:
+                raise HTTPException(status_code=403, detail="אין הרשאה לנתוני מסעדות")
+            raise HTTPException(status_code=400, detail="יש לבחור מסעדה")
+        if requested not in self.restaurant_ids:
+            raise HTTPException(status_code=403, detail="אין הרשאה למסעדה זו")
+        return requested
+
+# token -> Principal, each entry kept only for the token's remaining lifetime
+_principals = LRUTTLCache(TOKEN_CACHE_SIZE, ttl=0)
+
+def decode_principal(token: str) -> Principal:
+    principal = _principals.get(token)
+    if principal is not None:
+        return principal
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise HTTPException(status_code=401, detail="Invalid token")
-        return username
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
+    username = payload.get("sub")
+    if username is None:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    principal = Principal(username, payload.get("role"), tuple(payload.get("restaurant_ids") or ()))
+    if payload.get("exp"):
+        _principals.set(token, principal, ttl=payload["exp"] - time.time())
+    return principal
+
+async def ensure_active(principal: Principal, session_factory=AsyncSessionLocal) -> Principal:
+    # Claims are trusted for authorization, but a deactivated user's token stops working
+    # well before it expires; the answer is cached, so most requests run no query
+    async with session_factory() as db:
+        active = await is_active_async(db, principal.username)
+    if not active:
+        raise HTTPException(status_code=401, detail="Inactive user")
+    return principal
+
+async def get_principal(request: Request, credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)) -> Principal:
+    # Set by AuthMiddleware when it is mounted; decoding here covers apps without it
+    principal = request.scope.get("principal")
+    if principal is not None:
+        return principal
+    if credentials is None:
+        raise HTTPException(status_code=401, detail="Token required", headers={"WWW-Authenticate": "Bearer"})
+    return await ensure_active(decode_principal(credentials.credentials))
+
+async def require_headquarters(principal: Principal = Depends(get_principal)) -> Principal:
+    if not principal.is_headquarters:
+        raise HTTPException(status_code=403, detail="אין הרשאה")
+    return principal
+
+async def query_restaurant_scope(restaurant_id: Optional[int] = None, principal: Principal = Depends(get_principal)) -> Optional[int]:
+    return principal.resolve_restaurant(restaurant_id)
+
+async def path_restaurant_scope(restaurant_id: int, principal: Principal = Depends(get_principal)) -> int:
+    return principal.resolve_restaurant(restaurant_id)
+
+async def verify_token(credentials: HTTPAuthorizationCredentials = None):
+    if not credentials:
+        raise HTTPException(status_code=401, detail="Token required")
+    return decode_principal(credentials.credentials).username
+
+def _bearer_token(scope) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            return token.strip() if scheme.lower() == "bearer" and token.strip() else None
+    return None
+
+def _query_token(scope) -> Optional[str]:
+    values = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("access_token")
+    return values[0] if values else None
 
 class AuthMiddleware:
-    def __init__(self, app):
+    def __init__(self, app, public_paths: Iterable[str] = None, session_factory=AsyncSessionLocal):
         self.app = app
+        self.session_factory = session_factory
+        self.public_paths = re.compile("|".join(f"(?:{path})" for path in (public_paths or PUBLIC_PATHS)))
+        self.query_token_paths = re.compile("|".join(f"(?:{path})" for path in QUERY_TOKEN_PATHS))
     
     async def __call__(self, scope, receive, send):
-        # Add authentication middleware logic here
-        await self.app(scope, receive, send)
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or self.public_paths.fullmatch(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        token = _bearer_token(scope)
+        if token is None and self.query_token_paths.fullmatch(scope["path"]):
+            token = _query_token(scope)
+        try:
+            if token is None:
+                raise HTTPException(status_code=401, detail="Token required")
+            scope["principal"] = await ensure_active(decode_principal(token), self.session_factory)
+        except HTTPException as e:
+            response = JSONResponse({"detail": e.detail}, status_code=e.status_code, headers={"WWW-Authenticate": "Bearer"})
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
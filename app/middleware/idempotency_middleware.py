@@ -0,0 +1,131 @@
+from fastapi.responses import JSONResponse
+from ..database.database import AsyncSessionLocal
+from ..services.idempotency import idempotency_service
+import hashlib
+import logging
+import os
+
+WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+MAX_KEY_LENGTH = 255
+# Larger responses are passed through but not kept; a retry then runs the request again
+IDEMPOTENCY_MAX_RESPONSE_BYTES = int(os.getenv("IDEMPOTENCY_MAX_RESPONSE_BYTES", str(1024 * 1024)))
+# Answers that mean "try again later" are not the outcome of the request, so a retry must really run
+UNSTORED_STATUSES = (409, 429)
+
+logger = logging.getLogger(__name__)
+
+def _header(scope, name: bytes):
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1").strip()
+    return None
+
+class IdempotencyMiddleware:
+    # Mounted inside AuthMiddleware: keys are scoped to the authenticated user
+    def __init__(self, app, session_factory=AsyncSessionLocal):
+        self.app = app
+        self.session_factory = session_factory
+        self._in_flight = set()
+
+    async def __call__(self, scope, receive, send):
+        key = _header(scope, b"idempotency-key") if scope["type"] == "http" and scope["method"] in WRITE_METHODS else None
+        principal = scope.get("principal")
+        if key is None or principal is None:
+            await self.app(scope, receive, send)
+            return
+        if not key or len(key) > MAX_KEY_LENGTH:
+            await JSONResponse({"detail": "מפתח Idempotency-Key לא תקין"}, status_code=400)(scope, receive, send)
+            return
+
+        key_hash = idempotency_service.key_hash(principal.username, key)
+        if key_hash in self._in_flight:
+            response = JSONResponse(
+                {"detail": "בקשה עם אותו מפתח עדיין בטיפול"},
+                status_code=409,
+                headers={"Retry-After": "1"}
+            )
+            await response(scope, receive, send)
+            return
+
+        # The body is hashed as it streams through, so large uploads are never buffered here
+        body = {"hash": hashlib.sha256(), "complete": False, "disconnected": False}
+
+        async def hashing_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                body["hash"].update(message.get("body", b""))
+                body["complete"] = not message.get("more_body", False)
+            elif message["type"] == "http.disconnect":
+                body["disconnected"] = True
+            return message
+
+        async def drain():
+            while not body["complete"] and not body["disconnected"]:
+                await hashing_receive()
+
+        def fingerprint():
+            return idempotency_service.fingerprint(
+                scope["method"], scope["path"], scope.get("query_string", b""), body["hash"].digest()
+            )
+
+        self._in_flight.add(key_hash)
+        try:
+            stored = await self._lookup(key_hash)
+            if stored is not None:
+                await drain()
+                await self._replay(stored, fingerprint(), scope, receive, send)
+                return
+
+            captured = {"status": None, "headers": [], "body": [], "size": 0}
+
+            async def capture(message):
+                if message["type"] == "http.response.start":
+                    # Whatever the route left unread is still part of the request it answered
+                    await drain()
+                    captured["status"] = message["status"]
+                    captured["headers"] = [(k.decode("latin-1"), v.decode("latin-1")) for k, v in message.get("headers", [])]
+                elif message["type"] == "http.response.body":
+                    captured["size"] += len(message.get("body", b""))
+                    if captured["size"] <= IDEMPOTENCY_MAX_RESPONSE_BYTES:
+                        captured["body"].append(message.get("body", b""))
+                await send(message)
+
+            await self.app(scope, hashing_receive, capture)
+
+            status = captured["status"]
+            # Server errors may not have written anything; leave the key free for a real retry
+            if status is None or status >= 500 or status in UNSTORED_STATUSES or captured["size"] > IDEMPOTENCY_MAX_RESPONSE_BYTES:
+                return
+            if not body["complete"]:
+                # The client went away mid-upload; without the whole body there is nothing to match a retry against
+                return
+            await self._store(key_hash, idempotency_service.new_response(fingerprint(), status, captured["headers"], b"".join(captured["body"])))
+        finally:
+            self._in_flight.discard(key_hash)
+
+    async def _lookup(self, key_hash: str):
+        stored = idempotency_service.response_cache.get(key_hash)
+        if stored is None:
+            async with self.session_factory() as db:
+                stored = await db.run_sync(idempotency_service.load, key_hash)
+            if stored is not None:
+                idempotency_service.remember(key_hash, stored)
+        return stored
+
+    async def _store(self, key_hash: str, stored):
+        idempotency_service.remember(key_hash, stored)
+        try:
+            async with self.session_factory() as db:
+                await db.run_sync(idempotency_service.save, key_hash, stored)
+        except Exception:
+            # The response is already on its way; in-process retries still hit the cache
+            logger.exception("could not persist idempotency key")
+
+    async def _replay(self, stored, fingerprint: str, scope, receive, send):
+        if stored.fingerprint != fingerprint:
+            response = JSONResponse({"detail": "מפתח Idempotency-Key כבר שימש לבקשה אחרת"}, status_code=422)
+            await response(scope, receive, send)
+            return
+        headers = [(k.encode("latin-1"), v.encode("latin-1")) for k, v in stored.headers]
+        await send({"type": "http.response.start", "status": stored.status_code, "headers": headers + [(b"idempotent-replayed", b"true")]})
+        await send({"type": "http.response.body", "body": stored.body})
@@ -0,0 +1,36 @@
+from ..database.instrumentation import RequestQueries, current_queries, route_query_stats
+import os
+
+# Per-request SQL numbers as response headers; off in production
+DEBUG = os.getenv("DEBUG", "false").lower() in ("1", "true", "yes")
+
+class QueryStatsMiddleware:
+    def __init__(self, app, debug_headers: bool = DEBUG):
+        self.app = app
+        self.debug_headers = debug_headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        queries = RequestQueries()
+        token = current_queries.set(queries)
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start" and self.debug_headers:
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-db-queries", str(queries.count).encode()),
+                    (b"x-db-time-ms", f"{queries.total_time * 1000:.2f}".encode()),
+                    (b"x-db-slowest-ms", f"{queries.slowest_time * 1000:.2f}".encode())
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            current_queries.reset(token)
+            # The matched route template, so /reports/weekly/1 and /reports/weekly/2 aggregate together
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "<unmatched>"
+            route_query_stats.record(f"{scope['method']} {path}", queries)
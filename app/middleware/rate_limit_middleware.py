@@ -0,0 +1,91 @@
+from collections import defaultdict
+from fastapi import HTTPException, Request
+from fastapi.responses import JSONResponse
+from ..utils.rate_limit import TokenBucketTable
+from typing import Iterable
+import math
+import os
+import re
+
+# Requests the instance works on at once; beyond this new ones are shed instead of queued
+MAX_IN_FLIGHT_REQUESTS = int(os.getenv("MAX_IN_FLIGHT_REQUESTS", "200"))
+SHED_RETRY_AFTER_SECONDS = int(os.getenv("SHED_RETRY_AFTER_SECONDS", "1"))
+# Long-lived event streams would hold slots forever; the broadcaster caps them separately
+ADMISSION_EXEMPT_PATHS = [r"/live(/.*)?"]
+
+_buckets = {}
+limit_stats = defaultdict(lambda: {"allowed": 0, "limited": 0})
+admission_stats = {"max_in_flight": MAX_IN_FLIGHT_REQUESTS, "in_flight": 0, "shed": 0}
+
+def _client(request: Request) -> str:
+    # The authenticated user when AuthMiddleware ran, otherwise the caller's address
+    principal = request.scope.get("principal")
+    if principal is not None:
+        return f"user:{principal.username}"
+    return f"ip:{request.client.host if request.client else ''}"
+
+def rate_limit(route_class: str, rate: float, burst: int):
+    # Router dependency: APIRouter(..., dependencies=[Depends(rate_limit("ai", 1, 10))]).
+    # RATE_LIMIT_<CLASS>_RATE / _BURST override the router's numbers.
+    env = route_class.upper()
+    rate = float(os.getenv(f"RATE_LIMIT_{env}_RATE", rate))
+    burst = int(os.getenv(f"RATE_LIMIT_{env}_BURST", burst))
+    # Routers naming the same class share its buckets
+    buckets = _buckets.setdefault(route_class, TokenBucketTable(rate, burst))
+
+    async def check_rate_limit(request: Request):
+        allowed, wait = buckets.take(_client(request))
+        stats = limit_stats[route_class]
+        if allowed:
+            stats["allowed"] += 1
+            return
+        stats["limited"] += 1
+        raise HTTPException(
+            status_code=429,
+            detail="יותר מדי בקשות, נסו שוב בעוד רגע",
+            headers={"Retry-After": str(max(1, math.ceil(wait)))}
+        )
+
+    return check_rate_limit
+
+class AdmissionControlMiddleware:
+    def __init__(self, app, max_in_flight: int = MAX_IN_FLIGHT_REQUESTS, retry_after: int = SHED_RETRY_AFTER_SECONDS,
+                 exempt_paths: Iterable[str] = None):
+        self.app = app
+        self.max_in_flight = max_in_flight
+        self.retry_after = retry_after
+        self.exempt_paths = re.compile("|".join(f"(?:{path})" for path in (exempt_paths or ADMISSION_EXEMPT_PATHS)))
+        admission_stats["max_in_flight"] = max_in_flight
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.exempt_paths.fullmatch(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+        if admission_stats["in_flight"] >= self.max_in_flight:
+            admission_stats["shed"] += 1
+            response = JSONResponse(
+                {"detail": "השרת עמוס, נסו שוב בעוד רגע"},
+                status_code=503,
+                headers={"Retry-After": str(self.retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+        admission_stats["in_flight"] += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission_stats["in_flight"] -= 1
+
+def limits_snapshot():
+    return {
+        "admission": dict(admission_stats),
+        "rate_limits": {
+            route_class: {
+                "rate": buckets.rate,
+                "burst": buckets.burst,
+                "tracked_keys": len(buckets),
+                **limit_stats[route_class]
+            }
+            for route_class, buckets in sorted(_buckets.items())
+        }
+    }
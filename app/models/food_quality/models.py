@@ -1,10 +1,16 @@
-﻿from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey
+﻿from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from ..restaurants.restaurant import Base
 
 class FoodQuality(Base):
     __tablename__ = "food_quality"
+    __table_args__ = (
+        # Analytics filter on a branch + time window, group by dish, or follow one chef over time
+        Index("ix_food_quality_restaurant_created", "restaurant_id", "created_at"),
+        Index("ix_food_quality_restaurant_dish", "restaurant_id", "dish_name"),
+        Index("ix_food_quality_chef_created", "chef_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     chef_id = Column(Integer, ForeignKey("chefs.id"))
@@ -28,4 +34,19 @@ class Chef(Base):
     
     # Relationships
     restaurant = relationship("Restaurant", back_populates="chefs")
-    food_quality_records = relationship("FoodQuality", back_populates="chef")
+    food_quality_records = relationship("FoodQuality", back_populates="chef")
+
+# Per-day aggregates of food_quality, updated in the same transaction as each insert
+class FoodQualityDaily(Base):
+    __tablename__ = "food_quality_daily"
+    
+    # 0 stands for scores posted without a restaurant; primary key columns cannot be NULL
+    restaurant_id = Column(Integer, primary_key=True)
+    day = Column(Date, primary_key=True)
+    chef_id = Column(Integer, primary_key=True)
+    dish_name = Column(String(100), primary_key=True)
+    score_sum = Column(Float, nullable=False, default=0)
+    score_count = Column(Integer, nullable=False, default=0)
+    score_min = Column(Float)
+    score_max = Column(Float)
+    score_sq_sum = Column(Float, nullable=False, default=0)
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, DateTime, Integer, LargeBinary, String, Text
+from ..restaurants.restaurant import Base
+
+# Responses to writes sent with an Idempotency-Key, replayed when the client retries
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    
+    # sha256 of (client, key), so one client can never replay another's response
+    key_hash = Column(String(64), primary_key=True)
+    # Method, path, query string and body of the original request
+    fingerprint = Column(String(64), nullable=False)
+    status_code = Column(Integer, nullable=False)
+    headers = Column(Text, nullable=False)
+    body = Column(LargeBinary, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, DateTime, Float, Integer, LargeBinary, String, Text
+from datetime import datetime
+from ..restaurants.restaurant import Base
+
+# Reports and exports run by the in-process job runner; the row outlives the request that asked for it
+class Job(Base):
+    __tablename__ = "jobs"
+    
+    id = Column(String(32), primary_key=True)
+    kind = Column(String(50), nullable=False)
+    params = Column(Text, nullable=False)
+    status = Column(String(20), nullable=False, index=True)  # queued, running, succeeded, failed, cancelled
+    progress = Column(Float, nullable=False, default=0)
+    message = Column(String(200))
+    owner = Column(String(50), nullable=False)
+    restaurant_id = Column(Integer)
+    result = Column(LargeBinary)
+    # Large exports are written to a file under JOB_RESULT_DIR instead of into result
+    result_path = Column(String(500))
+    result_type = Column(String(100))
+    result_name = Column(String(200))
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    # Finished jobs and their results are deleted after this
+    expires_at = Column(DateTime, index=True)
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Index, Integer, String
+from ..restaurants.restaurant import Base
+
+# One entry per row written, numbered per restaurant in commit order; tablets sync by seq
+class ChangeLog(Base):
+    __tablename__ = "change_log"
+    __table_args__ = (
+        # Postgres answers the sync scan from this index alone; SQLite gets the same from WITHOUT ROWID
+        Index("ix_change_log_cursor", "restaurant_id", "seq", postgresql_include=["table_name", "row_id", "op"]).ddl_if(dialect="postgresql"),
+        {"sqlite_with_rowid": False},
+    )
+    
+    # 0 stands for rows without a restaurant, as in food_quality_daily
+    restaurant_id = Column(Integer, primary_key=True)
+    seq = Column(Integer, primary_key=True)
+    table_name = Column(String(32), nullable=False)
+    row_id = Column(Integer, nullable=False)
+    op = Column(String(1), nullable=False)  # 'u' insert/update, 'd' delete
+
+# Last seq handed out per restaurant; its row lock orders concurrent writers to the same branch
+class ChangeCursor(Base):
+    __tablename__ = "change_cursors"
+    
+    restaurant_id = Column(Integer, primary_key=True)
+    seq = Column(Integer, nullable=False, default=0)
@@ -1,25 +1,30 @@
 ﻿from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from ..database.database import get_db
-from ..services.ai.ai_service import ai_service
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...database.database import get_read_db
+from ...middleware.auth_middleware import Principal, get_principal, path_restaurant_scope
+from ...middleware.rate_limit_middleware import rate_limit
+from ...services.ai.ai_service import ai_service
 from pydantic import BaseModel
 
-router = APIRouter(prefix="/ai", tags=["ai"])
+# A stuck tablet re-asking in a loop should not starve the rest of the chain
+router = APIRouter(prefix="/ai", tags=["ai"], dependencies=[Depends(rate_limit("ai", rate=1, burst=10))])
 
 class QueryRequest(BaseModel):
     question: str
     restaurant_id: int = None
 
 @router.post("/query")
-async def ai_query(request: QueryRequest, db: Session = Depends(get_db)):
+async def ai_query(request: QueryRequest, principal: Principal = Depends(get_principal), db: AsyncSession = Depends(get_read_db)):
+    restaurant_id = principal.resolve_restaurant(request.restaurant_id)
+    allowed_restaurant_ids = None if principal.is_headquarters else principal.restaurant_ids
     try:
-        result = ai_service.query_database(db, request.question)
+        result = await db.run_sync(ai_service.query_database, request.question, restaurant_id, allowed_restaurant_ids)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"AI query failed: {str(e)}")
 
 @router.get("/suggestions/{restaurant_id}")
-async def get_suggestions(restaurant_id: int, db: Session = Depends(get_db)):
+async def get_suggestions(restaurant_id: int = Depends(path_restaurant_scope), db: AsyncSession = Depends(get_read_db)):
     # Generate automatic suggestions based on data
     suggestions = [
         "מה הציון הממוצע השבוע?",
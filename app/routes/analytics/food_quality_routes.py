@@ -1,19 +1,63 @@
-﻿from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from ..database.database import get_db
-from ..models.food_quality.models import FoodQuality, Chef
-from datetime import datetime, timedelta
+﻿from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from pydantic import BaseModel, Field, ValidationError
+from ...database.database import AsyncReadSessionLocal, get_db, get_read_db
+from ...middleware.auth_middleware import Principal, get_principal, path_restaurant_scope, query_restaurant_scope
+from ...middleware.rate_limit_middleware import rate_limit
+from ...services.charts import chart_service
+from ...services.food_quality import food_quality_service
+from ...services.food_quality.food_quality_service import BULK_CHUNK_SIZE
+from ...services.food_quality.write_buffer import WriteBufferFull, write_buffer
+from ..jobs.job_routes import accept_job
+import json
 
-router = APIRouter(prefix="/food-quality", tags=["food-quality"])
+router = APIRouter(prefix="/food-quality", tags=["food-quality"], dependencies=[Depends(rate_limit("food_quality", rate=20, burst=100))])
+
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+class FoodQualityIn(BaseModel):
+    chef_id: int
+    dish_name: str
+    score: float = Field(..., ge=1, le=10, description="ציון בין 1 ל-10")
+    notes: Optional[str] = None
+    restaurant_id: Optional[int] = None
 
 @router.get("/")
-async def get_food_quality_records(restaurant_id: int = None, db: Session = Depends(get_db)):
-    query = db.query(FoodQuality)
-    if restaurant_id:
-        query = query.filter(FoodQuality.restaurant_id == restaurant_id)
-    records = query.all()
-    return records
+async def get_food_quality_records(
+    restaurant_id: Optional[int] = Depends(query_restaurant_scope),
+    limit: int = Query(100, ge=1, le=1000),
+    after: str = None,
+    stream: bool = False,
+    db: AsyncSession = Depends(get_read_db)
+):
+    cursor = None
+    if after:
+        try:
+            cursor = food_quality_service.decode_cursor(after)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="סמן עימוד לא תקין")
+
+    if stream:
+        return StreamingResponse(_stream_records(restaurant_id, cursor), media_type="application/json")
+    return await db.run_sync(food_quality_service.get_records_page, restaurant_id, limit, cursor)
+
+async def _stream_records(restaurant_id, cursor):
+    # Owns its session: the response body is produced after the request dependencies are done
+    async with AsyncReadSessionLocal() as db:
+        yield "["
+        i = 0
+        async for record in food_quality_service.aiter_records(db, restaurant_id, cursor):
+            yield ("," if i else "") + json.dumps(record, ensure_ascii=False)
+            i += 1
+        yield "]"
+
+@router.post("/export", status_code=202)
+async def export_food_quality_records(restaurant_id: Optional[int] = Depends(query_restaurant_scope), principal: Principal = Depends(get_principal)):
+    # A POST, since it queues a job and writes a file; poll /jobs/{id} and download from /jobs/{id}/result
+    return await accept_job("food_quality_csv", {"restaurant_id": restaurant_id}, principal, restaurant_id)
 
 @router.post("/")
 async def create_food_quality_record(
@@ -21,27 +65,106 @@ async def create_food_quality_record(
     dish_name: str,
     score: float,
     notes: str = None,
-    restaurant_id: int = None,
-    db: Session = Depends(get_db)
+    restaurant_id: Optional[int] = Depends(query_restaurant_scope),
+    db: AsyncSession = Depends(get_db)
 ):
-    record = FoodQuality(
-        chef_id=chef_id,
-        dish_name=dish_name,
-        score=score,
-        notes=notes,
-        restaurant_id=restaurant_id
-    )
-    db.add(record)
-    db.commit()
-    db.refresh(record)
-    return record
+    data = {
+        "chef_id": chef_id,
+        "dish_name": dish_name,
+        "score": score,
+        "notes": notes,
+        "restaurant_id": restaurant_id
+    }
+    if write_buffer.running:
+        try:
+            return await write_buffer.submit(data, db.info.get("writer"))
+        except WriteBufferFull:
+            raise HTTPException(status_code=503, detail="השרת עמוס, נסו שוב בעוד רגע", headers={"Retry-After": "1"})
+    return await db.run_sync(food_quality_service.create_record, data)
+
+async def _iter_json_array(request: Request):
+    try:
+        payload = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="גוף הבקשה אינו JSON תקין")
+    if not isinstance(payload, list):
+        raise HTTPException(status_code=400, detail="יש לשלוח מערך JSON של רשומות")
+    for index, item in enumerate(payload):
+        yield index, item
+
+async def _iter_ndjson(request: Request):
+    # Parse line by line as the body streams in, so large uploads never sit in memory whole
+    index = 0
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield index, line
+                index += 1
+    if buffer.strip():
+        yield index, buffer
+
+def _flush_chunk(db, pending: List, results: List):
+    if not pending:
+        return
+    try:
+        ids = food_quality_service.insert_chunk(db, [row for _, row in pending])
+    except SQLAlchemyError as e:
+        db.rollback()
+        for index, _ in pending:
+            results.append({"index": index, "status": "error", "errors": [{"msg": str(e.orig or e)}]})
+    else:
+        for (index, _), record_id in zip(pending, ids):
+            results.append({"index": index, "status": "created", "id": record_id})
+    pending.clear()
+
+@router.post("/bulk")
+async def create_food_quality_records_bulk(request: Request, principal: Principal = Depends(get_principal), db: AsyncSession = Depends(get_db)):
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    ndjson = content_type in NDJSON_CONTENT_TYPES
+    items = _iter_ndjson(request) if ndjson else _iter_json_array(request)
+
+    results = []
+    pending = []
+    async for index, item in items:
+        try:
+            if ndjson:
+                item = json.loads(item)
+            row = FoodQualityIn.model_validate(item)
+            row.restaurant_id = principal.resolve_restaurant(row.restaurant_id)
+        except ValueError as e:
+            # ValidationError is a ValueError, so malformed NDJSON lines land here too
+            errors = e.errors(include_url=False, include_context=False) if isinstance(e, ValidationError) else [{"msg": str(e)}]
+            results.append({"index": index, "status": "error", "errors": errors})
+            continue
+        except HTTPException as e:
+            # One foreign row must not sink the rest of the upload
+            results.append({"index": index, "status": "error", "errors": [{"msg": e.detail}]})
+            continue
+        pending.append((index, row.model_dump()))
+        if len(pending) >= BULK_CHUNK_SIZE:
+            await db.run_sync(_flush_chunk, pending, results)
+    await db.run_sync(_flush_chunk, pending, results)
+
+    results.sort(key=lambda r: r["index"])
+    created = sum(1 for r in results if r["status"] == "created")
+    return {"created": created, "failed": len(results) - created, "results": results}
 
 @router.get("/weekly-comparison/{restaurant_id}")
-async def get_weekly_comparison(restaurant_id: int, db: Session = Depends(get_db)):
+async def get_weekly_comparison(restaurant_id: int = Depends(path_restaurant_scope), db: AsyncSession = Depends(get_read_db)):
     # Get current week and previous week averages
-    today = datetime.now()
-    current_week_start = today - timedelta(days=today.weekday())
-    previous_week_start = current_week_start - timedelta(days=7)
-    
-    # TODO: Implement weekly comparison logic
-    return {"message": "Weekly comparison for restaurant {}".format(restaurant_id)}
+    return await db.run_sync(chart_service.get_weekly_scores_chart_data, restaurant_id)
+
+@router.get("/top-dishes/{restaurant_id}")
+async def get_top_dishes(restaurant_id: int = Depends(path_restaurant_scope), db: AsyncSession = Depends(get_read_db)):
+    return await db.run_sync(chart_service.get_top_dishes_data, restaurant_id)
+
+@router.get("/daily-trend/{restaurant_id}")
+async def get_daily_trend(restaurant_id: int = Depends(path_restaurant_scope), days: int = Query(14, ge=1, le=366), db: AsyncSession = Depends(get_read_db)):
+    return await db.run_sync(chart_service.get_daily_trend_data, restaurant_id, days)
+
+@router.get("/chef-breakdown/{restaurant_id}")
+async def get_chef_breakdown(restaurant_id: int = Depends(path_restaurant_scope), db: AsyncSession = Depends(get_read_db)):
+    return await db.run_sync(chart_service.get_chef_breakdown_data, restaurant_id)
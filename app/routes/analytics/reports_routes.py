@@ -1,66 +1,62 @@
-﻿from fastapi import APIRouter, Depends, HTTPException, Response
-from sqlalchemy.orm import Session
-from ..database.database import get_db
-from ..models.food_quality.models import FoodQuality
-from datetime import datetime, timedelta
-import json
+﻿from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...database.database import get_read_db
+from ...middleware.auth_middleware import Principal, get_principal, path_restaurant_scope
+from ...middleware.rate_limit_middleware import rate_limit
+from ..jobs.job_routes import accept_job
+from ...services.reports import report_service
+from ...utils.cache import payload_cache
 
-router = APIRouter(prefix="/reports", tags=["reports"])
+router = APIRouter(prefix="/reports", tags=["reports"], dependencies=[Depends(rate_limit("reports", rate=5, burst=20))])
+
+# GET builds the report inline. POST to the same path queues it as a job for ranges too long to
+# wait on and answers 202 with the job to poll at /jobs/{id}; being a POST, a retry can carry an
+# Idempotency-Key instead of queueing the same report again.
 
 @router.get("/weekly/{restaurant_id}")
-async def get_weekly_report(restaurant_id: int = None, db: Session = Depends(get_db)):
-    # Generate weekly report data
-    weeks_data = []
-    
-    for i in range(4):  # Last 4 weeks
-        week_start = datetime.now() - timedelta(weeks=i+1)
-        week_end = week_start + timedelta(days=7)
-        
-        week_records = db.query(FoodQuality).filter(
-            FoodQuality.created_at >= week_start,
-            FoodQuality.created_at < week_end
-        )
-        
-        if restaurant_id:
-            week_records = week_records.filter(FoodQuality.restaurant_id == restaurant_id)
-        
-        records = week_records.all()
-        
-        if records:
-            avg_score = sum(r.score for r in records) / len(records)
-            # Get most popular dish
-            dish_counts = {}
-            for record in records:
-                dish_counts[record.dish_name] = dish_counts.get(record.dish_name, 0) + 1
-            top_dish = max(dish_counts.keys(), key=lambda x: dish_counts[x]) if dish_counts else "N/A"
-            
-            weeks_data.append({
-                "period": f"שבוע {i+1}",
-                "averageScore": avg_score,
-                "totalRecords": len(records),
-                "topDish": top_dish,
-                "improvementTrend": 0  # Calculate based on previous week
-            })
-    
-    # Calculate improvement trends
-    for i in range(1, len(weeks_data)):
-        if weeks_data[i]["averageScore"] > 0:
-            weeks_data[i-1]["improvementTrend"] = (
-                (weeks_data[i-1]["averageScore"] - weeks_data[i]["averageScore"]) / weeks_data[i]["averageScore"] * 100
-            )
-    
-    return weeks_data
+async def get_weekly_report(
+    restaurant_id: int = Depends(path_restaurant_scope),
+    weeks: int = Query(4, ge=1, le=104),
+    db: AsyncSession = Depends(get_read_db)
+):
+    return await db.run_sync(lambda session: payload_cache.get_or_set("weekly_report", restaurant_id, weeks,
+        lambda: report_service.build_period_report(session, "week", weeks, restaurant_id)))
+
+@router.post("/weekly/{restaurant_id}", status_code=202)
+async def queue_weekly_report(
+    restaurant_id: int = Depends(path_restaurant_scope),
+    weeks: int = Query(4, ge=1, le=104),
+    principal: Principal = Depends(get_principal)
+):
+    return await accept_job("weekly_report", {"buckets": weeks, "restaurant_id": restaurant_id}, principal, restaurant_id)
 
 @router.get("/monthly/{restaurant_id}")
-async def get_monthly_report(restaurant_id: int = None, db: Session = Depends(get_db)):
-    # Similar logic for monthly data
-    return [{"period": "חודש זה", "averageScore": 7.5, "totalRecords": 100, "topDish": "פסטה", "improvementTrend": 2.5}]
+async def get_monthly_report(
+    restaurant_id: int = Depends(path_restaurant_scope),
+    months: int = Query(6, ge=1, le=60),
+    db: AsyncSession = Depends(get_read_db)
+):
+    return await db.run_sync(lambda session: payload_cache.get_or_set("monthly_report", restaurant_id, months,
+        lambda: report_service.build_period_report(session, "month", months, restaurant_id)))
+
+@router.post("/monthly/{restaurant_id}", status_code=202)
+async def queue_monthly_report(
+    restaurant_id: int = Depends(path_restaurant_scope),
+    months: int = Query(6, ge=1, le=60),
+    principal: Principal = Depends(get_principal)
+):
+    return await accept_job("monthly_report", {"buckets": months, "restaurant_id": restaurant_id}, principal, restaurant_id)
+
+@router.post("/export/weekly/csv/{restaurant_id}", status_code=202)
+async def export_weekly_csv(restaurant_id: int = Depends(path_restaurant_scope), weeks: int = Query(4, ge=1, le=104), principal: Principal = Depends(get_principal)):
+    # Always a job; the file is fetched from /jobs/{id}/result once it is ready
+    return await accept_job("weekly_report_csv", {"buckets": weeks, "restaurant_id": restaurant_id}, principal, restaurant_id)
 
 @router.get("/export/weekly/pdf/{restaurant_id}")
-async def export_weekly_pdf(restaurant_id: int = None):
+async def export_weekly_pdf(restaurant_id: int = Depends(path_restaurant_scope)):
     # Generate PDF report (placeholder)
     return Response(
         content="PDF report would be generated here",
         media_type="application/pdf",
         headers={"Content-Disposition": "attachment; filename=weekly_report.pdf"}
-    )
+    )
@@ -1,26 +1,34 @@
 ﻿from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from ..database.database import get_db
-from ..models.users.user import User
-from ..services.auth.auth_service import authenticate_user, create_access_token
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...database.database import get_db
+from ...middleware.rate_limit_middleware import rate_limit
+from ...services.auth.auth_service import PasswordHashingBusy, authenticate_user_async, create_access_token, token_claims
 
-router = APIRouter(prefix="/auth", tags=["authentication"])
+# Each attempt costs a bcrypt verification; also slows password guessing
+router = APIRouter(prefix="/auth", tags=["authentication"], dependencies=[Depends(rate_limit("auth", rate=0.5, burst=5))])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
 @router.post("/token")
-async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = authenticate_user(db, form_data.username, form_data.password)
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
+    try:
+        user = await authenticate_user_async(db, form_data.username, form_data.password)
+    except PasswordHashingBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="המערכת עמוסה, נסו להתחבר שוב בעוד רגע",
+            headers={"Retry-After": "1"},
+        )
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="שם משתמש או סיסמה שגויים",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token = create_access_token(data={"sub": user.username})
+    access_token = create_access_token(data=token_claims(user))
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/me")
-async def read_users_me(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def read_users_me(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
     # TODO: Implement get current user from token
     return {"message": "Current user info"}
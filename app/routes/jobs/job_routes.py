@@ -0,0 +1,62 @@
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import FileResponse, JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, Optional
+from ...database.database import get_db
+from ...middleware.auth_middleware import Principal, get_principal
+from ...middleware.rate_limit_middleware import rate_limit
+from ...models.jobs.job import Job
+from ...services.jobs import job_service
+from ...services.jobs.job_runner import JobQueueFull, job_runner
+from ...services.jobs.job_service import FINISHED, SUCCEEDED
+import os
+
+# Polling clients are expected to back off to about once a second
+router = APIRouter(prefix="/jobs", tags=["jobs"], dependencies=[Depends(rate_limit("jobs", rate=5, burst=20))])
+
+async def accept_job(kind: str, params: Dict, principal: Principal, restaurant_id: Optional[int]) -> JSONResponse:
+    # What a route returns instead of the payload when the work runs in the background
+    try:
+        job_id = await job_runner.submit(kind, params, principal.username, restaurant_id)
+    except JobQueueFull:
+        raise HTTPException(status_code=503, detail="השרת עמוס, נסו שוב בעוד רגע", headers={"Retry-After": "30"})
+    return JSONResponse(
+        status_code=202,
+        content={"job_id": job_id, "status": job_service.QUEUED, "status_url": f"/jobs/{job_id}"},
+        headers={"Location": f"/jobs/{job_id}"}
+    )
+
+async def _load(db: AsyncSession, job_id: str, principal: Principal, with_result: bool = False) -> Job:
+    job = await db.run_sync(job_service.get_job, job_id, with_result)
+    # Someone else's job looks the same as one that does not exist
+    if job is None or not (principal.is_headquarters or job.owner == principal.username):
+        raise HTTPException(status_code=404, detail="משימה לא נמצאה")
+    return job
+
+@router.get("/{job_id}")
+async def get_job(job_id: str, principal: Principal = Depends(get_principal), db: AsyncSession = Depends(get_db)):
+    job = await _load(db, job_id, principal)
+    headers = {} if job.status in FINISHED else {"Retry-After": "1"}
+    return JSONResponse(content=job_service.serialize_job(job), headers=headers)
+
+@router.get("/{job_id}/result")
+async def get_job_result(job_id: str, principal: Principal = Depends(get_principal), db: AsyncSession = Depends(get_db)):
+    job = await _load(db, job_id, principal, with_result=True)
+    if job.status != SUCCEEDED:
+        raise HTTPException(status_code=409, detail="המשימה לא הסתיימה בהצלחה")
+    if job.result_path:
+        # Sent in chunks straight from the spool file
+        if not os.path.exists(job.result_path):
+            raise HTTPException(status_code=410, detail="קובץ התוצאה כבר אינו זמין")
+        return FileResponse(job.result_path, media_type=job.result_type, filename=job.result_name)
+    headers = {"Content-Disposition": f"attachment; filename={job.result_name}"} if job.result_name else {}
+    return Response(content=job.result, media_type=job.result_type, headers=headers)
+
+@router.delete("/{job_id}", status_code=202)
+async def cancel_job(job_id: str, principal: Principal = Depends(get_principal), db: AsyncSession = Depends(get_db)):
+    job = await _load(db, job_id, principal)
+    if job.status in FINISHED:
+        raise HTTPException(status_code=409, detail="המשימה כבר הסתיימה")
+    await job_runner.cancel(job_id)
+    db.expire_all()
+    return job_service.serialize_job(await _load(db, job_id, principal))
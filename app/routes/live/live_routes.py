@@ -0,0 +1,67 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from typing import Dict, Hashable, Optional
+from ...database.database import AsyncReadSessionLocal
+from ...middleware.auth_middleware import Principal, get_principal, path_restaurant_scope
+from ...middleware.rate_limit_middleware import rate_limit
+from ...services.charts import chart_service
+from ...services.live.broadcaster import Subscriber, TooManySubscribers, broadcaster
+from ...services.live.live_service import HEADQUARTERS
+import asyncio
+import json
+import os
+
+# Comment lines at this interval keep proxies from closing an idle stream
+LIVE_HEARTBEAT_SECONDS = float(os.getenv("LIVE_HEARTBEAT_SECONDS", "15"))
+
+# Reconnect storms, not the streams themselves, are what this limits
+router = APIRouter(prefix="/live", tags=["live"], dependencies=[Depends(rate_limit("live", rate=1, burst=5))])
+
+def _format(name: str, data: Dict) -> str:
+    return f"event: {name}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def _events(subscriber: Subscriber, snapshot: Dict):
+    getter = None
+    try:
+        yield "retry: 3000\n\n" + _format("weekly", snapshot)
+        while True:
+            # The same get() survives heartbeats, so no event is lost to a timeout
+            getter = getter or asyncio.ensure_future(subscriber.queue.get())
+            done, _ = await asyncio.wait({getter}, timeout=LIVE_HEARTBEAT_SECONDS)
+            if not done:
+                yield ": keepalive\n\n"
+                continue
+            message, getter = getter.result(), None
+            if message is None:
+                # Dropped for falling behind; the client reconnects and starts from a fresh snapshot
+                return
+            yield _format(message["event"], message["data"])
+    finally:
+        if getter is not None:
+            getter.cancel()
+        broadcaster.unsubscribe(subscriber)
+
+async def _stream(topic: Hashable, restaurant_id: Optional[int]):
+    # Not a dependency: those are torn down only when the response ends, and a stream never does,
+    # so each open connection would hold a pooled connection for its whole life
+    async with AsyncReadSessionLocal() as db:
+        weekly = await db.run_sync(chart_service.get_weekly_scores_chart_data, restaurant_id)
+    try:
+        subscriber = broadcaster.subscribe(topic)
+    except TooManySubscribers:
+        raise HTTPException(status_code=503, detail="השרת עמוס, נסו שוב בעוד רגע", headers={"Retry-After": "5"})
+    return StreamingResponse(
+        _events(subscriber, {"restaurant_id": restaurant_id, **weekly}),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/")
+async def stream_headquarters(principal: Principal = Depends(get_principal)):
+    if not principal.is_headquarters:
+        raise HTTPException(status_code=403, detail="אין הרשאה לנתוני מסעדות")
+    return await _stream(HEADQUARTERS, None)
+
+@router.get("/{restaurant_id}")
+async def stream_restaurant(restaurant_id: int = Depends(path_restaurant_scope)):
+    return await _stream(restaurant_id, restaurant_id)
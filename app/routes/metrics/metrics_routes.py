@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends
+from ...database.engine import pool_stats
+from ...database.instrumentation import route_query_stats
+from ...middleware.auth_middleware import require_headquarters
+from ...middleware.rate_limit_middleware import limits_snapshot
+from ...services.food_quality.write_buffer import write_buffer
+from ...services.jobs.job_runner import job_runner
+from ...services.live.broadcaster import broadcaster
+from ...utils.cache import answer_cache, payload_cache
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+# /metrics/cache and /metrics/write-buffer are public (see PUBLIC_PATHS); the rest expose SQL text,
+# route names or branch ids
+headquarters_only = [Depends(require_headquarters)]
+
+@router.get("/cache")
+async def get_cache_metrics():
+    return {
+        "payload_cache": payload_cache.stats(),
+        "ai_answer_cache": answer_cache.stats()
+    }
+
+@router.get("/db-pool", dependencies=headquarters_only)
+async def get_db_pool_metrics():
+    return pool_stats()
+
+@router.get("/sql", dependencies=headquarters_only)
+async def get_sql_metrics():
+    return route_query_stats.stats()
+
+@router.get("/limits", dependencies=headquarters_only)
+async def get_limit_metrics():
+    return limits_snapshot()
+
+@router.get("/write-buffer")
+async def get_write_buffer_metrics():
+    return write_buffer.stats()
+
+@router.get("/live", dependencies=headquarters_only)
+async def get_live_metrics():
+    return broadcaster.stats()
+
+@router.get("/jobs", dependencies=headquarters_only)
+async def get_job_metrics():
+    return job_runner.stats()
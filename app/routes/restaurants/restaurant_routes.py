@@ -1,19 +1,21 @@
 ﻿from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from ..database.database import get_db
-from ..models.restaurants.restaurant import Restaurant
+from ...database.database import get_db
+from ...middleware.rate_limit_middleware import rate_limit
+from ...models.restaurants.restaurant import Restaurant
 
-router = APIRouter(prefix="/restaurants", tags=["restaurants"])
+router = APIRouter(prefix="/restaurants", tags=["restaurants"], dependencies=[Depends(rate_limit("restaurants", rate=20, burst=100))])
 
 @router.get("/", response_model=List[dict])
-async def get_restaurants(db: Session = Depends(get_db)):
-    restaurants = db.query(Restaurant).all()
+async def get_restaurants(db: AsyncSession = Depends(get_db)):
+    restaurants = (await db.scalars(select(Restaurant))).all()
     return [{"id": r.id, "name": r.name, "location": r.location} for r in restaurants]
 
 @router.get("/{restaurant_id}")
-async def get_restaurant(restaurant_id: int, db: Session = Depends(get_db)):
-    restaurant = db.query(Restaurant).filter(Restaurant.id == restaurant_id).first()
+async def get_restaurant(restaurant_id: int, db: AsyncSession = Depends(get_db)):
+    restaurant = await db.get(Restaurant, restaurant_id)
     if not restaurant:
         raise HTTPException(status_code=404, detail="מסעדה לא נמצאה")
     return {"id": restaurant.id, "name": restaurant.name, "location": restaurant.location}
@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...database.database import get_db
+from ...middleware.auth_middleware import path_restaurant_scope
+from ...middleware.rate_limit_middleware import rate_limit
+from ...services.sync import sync_service
+from ...services.sync.sync_service import SYNC_PAGE_SIZE
+import asyncio
+import gzip
+import json
+import os
+
+SYNC_GZIP_LEVEL = int(os.getenv("SYNC_GZIP_LEVEL", "6"))
+# Below this the gzip header and CPU cost more than they save
+SYNC_GZIP_MIN_BYTES = int(os.getenv("SYNC_GZIP_MIN_BYTES", "1024"))
+
+router = APIRouter(prefix="/sync", tags=["sync"], dependencies=[Depends(rate_limit("sync", rate=2, burst=10))])
+
+def _encode(payload, gzip_ok: bool):
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()
+    if gzip_ok and len(body) >= SYNC_GZIP_MIN_BYTES:
+        return gzip.compress(body, compresslevel=SYNC_GZIP_LEVEL), {"Content-Encoding": "gzip", "Vary": "Accept-Encoding"}
+    return body, {"Vary": "Accept-Encoding"}
+
+@router.get("/{restaurant_id}")
+async def get_changes(
+    request: Request,
+    restaurant_id: int = Depends(path_restaurant_scope),
+    cursor: int = Query(0, ge=0),
+    limit: int = Query(SYNC_PAGE_SIZE, ge=1, le=SYNC_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db)
+):
+    # Always the primary: a lagging replica would see a tablet's cursor as one from another
+    # database and send it back to 0. Tablets call again with the returned cursor while has_more is true
+    payload = await db.run_sync(sync_service.get_changes, restaurant_id, cursor, limit)
+    gzip_ok = "gzip" in request.headers.get("accept-encoding", "").lower()
+    # Serializing and compressing a full page is CPU work; keep it off the event loop
+    body, headers = await asyncio.to_thread(_encode, payload, gzip_ok)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -1,42 +1,19 @@
-﻿from flask import Flask, request, jsonify, render_template_string
-from flask_cors import CORS
-import os
 from datetime import datetime
+from fastapi import APIRouter, Depends
+from fastapi.responses import HTMLResponse, JSONResponse
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...database.database import get_db
+from ...middleware.rate_limit_middleware import rate_limit
+from ...models.restaurants.restaurant import Restaurant
+from ...services.auth.auth_service import PasswordHashingBusy, authenticate_user_async, create_access_token, token_claims
 
-app = Flask(__name__)
-CORS(app)
+# The login page and status probe that used to be served by the separate Flask app
+router = APIRouter(tags=["web"])
 
-# נתוני משתמשים
-users = {
-    "headquarters": {"password": "admin123", "role": "admin", "name": "מטה ראשי"},
-    "haifa_user": {"password": "haifa123", "role": "manager", "name": "סניף חיפה"}
-}
-
-# נתונים זמניים
-restaurants_data = {
-    "headquarters": {
-        "name": "מטה ראשי",
-        "chefs": [
-            {"name": "אמיר כהן", "rating": 9.2, "last_check": "2024-09-25"},
-            {"name": "שרה לוי", "rating": 8.8, "last_check": "2024-09-24"}
-        ],
-        "tasks": [
-            {"task": "בדיקת איכות בוקר", "status": "completed", "date": "2024-09-27"},
-            {"task": "הכשרת טבח חדש", "status": "pending", "date": "2024-09-28"}
-        ]
-    },
-    "haifa_user": {
-        "name": "סניף חיפה", 
-        "chefs": [
-            {"name": "יוסי מזרחי", "rating": 8.5, "last_check": "2024-09-26"},
-            {"name": "רחל אברהם", "rating": 9.0, "last_check": "2024-09-25"}
-        ],
-        "tasks": [
-            {"task": "ניקיון מטבח", "status": "completed", "date": "2024-09-27"},
-            {"task": "הזמנת חומרי גלם", "status": "pending", "date": "2024-09-28"}
-        ]
-    }
-}
+class LoginRequest(BaseModel):
+    username: str
+    password: str
 
 HTML_TEMPLATE = """
 <!DOCTYPE html>
@@ -90,12 +67,6 @@ HTML_TEMPLATE = """
         .message { margin-top: 10px; font-weight: bold; }
         .error { color: #e53e3e; }
         .success { color: #38a169; }
-        .demo-info { 
-            margin-top: 30px; 
-            color: #718096; 
-            font-size: 0.9rem; 
-            text-align: center;
-        }
     </style>
 </head>
 <body>
@@ -106,12 +77,12 @@ HTML_TEMPLATE = """
         <form id="loginForm">
             <div class="form-group">
                 <label class="form-label">שם משתמש</label>
-                <input type="text" id="username" class="form-input" placeholder="headquarters / haifa_user" required>
+                <input type="text" id="username" class="form-input" required>
             </div>
             
             <div class="form-group">
                 <label class="form-label">סיסמה</label>
-                <input type="password" id="password" class="form-input" placeholder="admin123 / haifa123" required>
+                <input type="password" id="password" class="form-input" required>
             </div>
             
             <button type="submit" class="login-btn">התחבר</button>
@@ -119,11 +90,6 @@ HTML_TEMPLATE = """
             <div id="message"></div>
         </form>
         
-        <div class="demo-info">
-            <strong>פרטי התחברות לדוגמה:</strong><br>
-            headquarters / admin123<br>
-            haifa_user / haifa123
-        </div>
     </div>
 
     <script>
@@ -144,6 +110,7 @@ HTML_TEMPLATE = """
                 const data = await response.json();
                 
                 if (data.success) {
+                    localStorage.setItem('token', data.access_token);
                     messageDiv.innerHTML = '<div class="message success">התחברות הצליחה! ✅</div>';
                     setTimeout(() => {
                         alert('ברוך הבא למערכת ' + data.user.name + '!\\nהמערכת פועלת בהצלחה.');
@@ -160,44 +127,42 @@ HTML_TEMPLATE = """
 </html>
 """
 
-@app.route('/')
-def home():
-    return render_template_string(HTML_TEMPLATE)
+@router.get("/", response_class=HTMLResponse)
+async def home():
+    return HTML_TEMPLATE
 
-@app.route('/api/login', methods=['POST'])
-def login():
+# Same bucket class as /auth/token, so the two login paths share one budget per client
+@router.post("/api/login", dependencies=[Depends(rate_limit("auth", rate=0.5, burst=5))])
+async def login(credentials: LoginRequest, db: AsyncSession = Depends(get_db)):
     try:
-        data = request.get_json()
-        username = data.get('username')
-        password = data.get('password')
-        
-        if username in users and users[username]['password'] == password:
-            user_data = users[username].copy()
-            user_data['username'] = username
-            return jsonify({
-                "success": True,
-                "message": "התחברות הצליחה",
-                "user": user_data
-            })
-        else:
-            return jsonify({
-                "success": False,
-                "message": "שם משתמש או סיסמה שגויים"
-            }), 401
-    except Exception as e:
-        return jsonify({
-            "success": False,
-            "message": "שגיאה בהתחברות"
-        }), 500
+        user = await authenticate_user_async(db, credentials.username, credentials.password)
+    except PasswordHashingBusy:
+        return JSONResponse(
+            {"success": False, "message": "המערכת עמוסה, נסו להתחבר שוב בעוד רגע"},
+            status_code=503,
+            headers={"Retry-After": "1"}
+        )
+    if not user:
+        return JSONResponse({"success": False, "message": "שם משתמש או סיסמה שגויים"}, status_code=401)
 
-@app.route('/api/status')
-def status():
-    return jsonify({
+    restaurant = await db.get(Restaurant, user.restaurant_id) if user.restaurant_id else None
+    return {
+        "success": True,
+        "message": "התחברות הצליחה",
+        "user": {
+            "username": user.username,
+            "role": user.role,
+            "restaurant_id": user.restaurant_id,
+            "name": restaurant.name if restaurant else "מטה ראשי"
+        },
+        "access_token": create_access_token(data=token_claims(user)),
+        "token_type": "bearer"
+    }
+
+@router.get("/api/status")
+async def status():
+    return {
         "message": "Kitchen Management API - מערכת פועלת!",
         "data": {"version": "1.0.0"},
         "timestamp": datetime.now().isoformat()
-    })
-
-if __name__ == '__main__':
-    port = int(os.environ.get('PORT', 5000))
-    app.run(host='0.0.0.0', port=port, debug=False)
\ No newline at end of file
+    }
@@ -1,73 +1,187 @@
-﻿from typing import Dict, List
+﻿from typing import Collection, Dict, Optional
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from ..models.food_quality.models import FoodQuality
-from ..models.restaurants.restaurant import Restaurant
-import json
+from ...models.food_quality.models import Chef, FoodQualityDaily
+from ...models.restaurants.restaurant import Restaurant
+from ..charts import chart_service
+from ..food_quality import rollup_service
+from ..reports import report_service
+from ...utils.cache import DataVersions, answer_cache
+from .intent_router import IntentRouter, Route, window_range
+import os
+import time
+
+# Restaurant, chef and dish names are compiled into the router; refresh them this often
+AI_VOCABULARY_TTL_SECONDS = float(os.getenv("AI_VOCABULARY_TTL_SECONDS", "300"))
+
+WINDOW_LABELS = {
+    "today": "היום",
+    "yesterday": "אתמול",
+    "this_week": "השבוע",
+    "last_week": "בשבוע שעבר",
+    "this_month": "החודש",
+    "last_month": "בחודש שעבר",
+}
 
 class KitchenAIService:
+    HANDLERS = {
+        "average": "_handle_average_query",
+        "weekly": "_handle_weekly_query",
+        "restaurants": "_handle_restaurant_query",
+        "dishes": "_handle_dish_query",
+        "chefs": "_handle_chef_query",
+        "count": "_handle_count_query",
+        "trend": "_handle_trend_query",
+        "daily_trend": "_handle_daily_trend_query",
+        "report": "_handle_report_query",
+        "distribution": "_handle_distribution_query",
+        "general": "_handle_general_query",
+    }
+    # Handlers that read every branch in scope, whatever restaurant the question is about
+    CHAIN_HANDLERS = {"restaurants"}
+    
     def __init__(self):
         self.context = {}
+        self.router = IntentRouter()
+        self._names = {"restaurant": {}, "chef": {}}
+        self._vocabulary_expires_at = 0
     
-    def query_database(self, db: Session, question: str) -> Dict:
-        question_lower = question.lower()
-        
-        if "ממוצע" in question or "average" in question_lower:
-            return self._handle_average_query(db, question)
-        elif "מסעדה" in question or "restaurant" in question_lower:
-            return self._handle_restaurant_query(db, question)
-        elif "השבוע" in question or "שבוע" in question:
-            return self._handle_weekly_query(db, question)
-        else:
-            return self._handle_general_query(db, question)
+    def _refresh_vocabulary(self, db: Session):
+        if time.monotonic() < self._vocabulary_expires_at:
+            return
+        restaurants = {name: id for id, name in db.query(Restaurant.id, Restaurant.name) if name}
+        chefs = {name: id for id, name in db.query(Chef.id, Chef.name) if name}
+        dishes = [dish for (dish,) in db.query(FoodQualityDaily.dish_name).distinct() if dish]
+        self.router.compile(restaurants, chefs, dishes)
+        self._names = {
+            "restaurant": {id: name for name, id in restaurants.items()},
+            "chef": {id: name for name, id in chefs.items()}
+        }
+        self._vocabulary_expires_at = time.monotonic() + AI_VOCABULARY_TTL_SECONDS
     
-    def _handle_average_query(self, db: Session, question: str) -> Dict:
-        # Calculate overall averages
-        from sqlalchemy import func
-        
-        avg_score = db.query(func.avg(FoodQuality.score)).scalar()
+    def route(self, db: Session, question: str, restaurant_id: int = None,
+              allowed_restaurant_ids: Optional[Collection[int]] = None) -> Route:
+        self._refresh_vocabulary(db)
+        route = self.router.route(question)
+        if route.restaurant_id is None:
+            route.restaurant_id = restaurant_id
+        if allowed_restaurant_ids is not None:
+            # Naming another branch in the question must not widen the asker's scope
+            route.restaurant_ids = tuple(sorted(allowed_restaurant_ids))
+            if route.restaurant_id not in route.restaurant_ids:
+                route.restaurant_id = restaurant_id
+        return route
+    
+    def query_database(self, db: Session, question: str, restaurant_id: int = None,
+                       allowed_restaurant_ids: Optional[Collection[int]] = None) -> Dict:
+        # Differently worded questions that route the same share one answer until the data changes
+        route = self.route(db, question, restaurant_id, allowed_restaurant_ids)
+        handler = getattr(self, self.HANDLERS[route.handler])
+        # Chain-wide answers follow the chain version, which moves on a write to any branch;
+        # route.key() still carries the asker's branches
+        version_scope = DataVersions.CHAIN if route.handler in self.CHAIN_HANDLERS else route.restaurant_id
+        return answer_cache.get_or_set(route.intent, version_scope, route.key(), lambda: handler(db, route))
+    
+    def _scoped(self, query, route: Route):
+        start, end = window_range(route.window)
+        query = rollup_service.scope(query, route.restaurant_id, start, end)
+        if route.chef_id:
+            query = query.filter(FoodQualityDaily.chef_id == route.chef_id)
+        if route.dish_name:
+            query = query.filter(FoodQualityDaily.dish_name == route.dish_name)
+        return query
+    
+    def _describe(self, route: Route) -> str:
+        parts = []
+        if route.dish_name:
+            parts.append(f"של {route.dish_name}")
+        if route.chef_id:
+            parts.append(f"של {self._names['chef'].get(route.chef_id, route.chef_id)}")
+        if route.restaurant_id:
+            parts.append(f"ב{self._names['restaurant'].get(route.restaurant_id, route.restaurant_id)}")
+        if route.window:
+            parts.append(WINDOW_LABELS[route.window])
+        return " ".join(parts)
+    
+    def _handle_average_query(self, db: Session, route: Route) -> Dict:
+        # Calculate overall averages, narrowed by whatever the question mentioned
+        score_sum, score_count = self._scoped(db.query(
+            func.sum(FoodQualityDaily.score_sum),
+            func.sum(FoodQualityDaily.score_count)
+        ), route).one()
+        avg_score = rollup_service.average(score_sum or 0, score_count or 0)
         
+        scope = self._describe(route)
+        answer = f"הציון הממוצע {scope} הוא {avg_score:.2f} ({score_count or 0} הערכות)" if scope else f"הציון הממוצע הכללי במערכת הוא {avg_score:.2f}"
         return {
-            "answer": f"הציון הממוצע הכללי במערכת הוא {avg_score:.2f}",
-            "data": {"average_score": avg_score},
+            "answer": answer,
+            "data": {"average_score": avg_score, "count": score_count or 0},
             "query_type": "average"
         }
     
-    def _handle_restaurant_query(self, db: Session, question: str) -> Dict:
-        restaurants = db.query(Restaurant).all()
-        restaurant_data = []
+    def _handle_restaurant_query(self, db: Session, route: Route) -> Dict:
+        # One statement for all branches; the outer join keeps branches with no scores yet
+        start, end = window_range(route.window)
+        totals = rollup_service.scope(db.query(
+            FoodQualityDaily.restaurant_id,
+            func.sum(FoodQualityDaily.score_sum).label("score_sum"),
+            func.sum(FoodQualityDaily.score_count).label("score_count")
+        ), start=start, end=end)
+        if route.restaurant_ids is not None:
+            totals = totals.filter(FoodQualityDaily.restaurant_id.in_(route.restaurant_ids))
+        totals = totals.group_by(FoodQualityDaily.restaurant_id).subquery()
         
-        for restaurant in restaurants:
-            from sqlalchemy import func
-            avg_score = db.query(func.avg(FoodQuality.score)).filter(
-                FoodQuality.restaurant_id == restaurant.id
-            ).scalar()
-            
-            restaurant_data.append({
-                "name": restaurant.name,
-                "average_score": avg_score or 0
-            })
+        rows = db.query(
+            Restaurant.name, totals.c.score_sum, totals.c.score_count
+        ).outerjoin(totals, totals.c.restaurant_id == Restaurant.id)
+        if route.restaurant_ids is not None:
+            rows = rows.filter(Restaurant.id.in_(route.restaurant_ids))
+        rows = rows.order_by(Restaurant.id).all()
         
+        restaurant_data = [
+            {
+                "name": name,
+                "average_score": rollup_service.average(score_sum or 0, score_count or 0),
+                "count": score_count or 0
+            }
+            for name, score_sum, score_count in rows
+        ]
+        
+        order = route.params.get("order")
+        if order:
+            # Branches without scores cannot be best or worst
+            restaurant_data = [r for r in restaurant_data if r["count"]]
+            restaurant_data.sort(key=lambda r: r["average_score"], reverse=order == "desc")
+            restaurant_data = restaurant_data[:route.params.get("limit")]
+        
+        answer = "נתוני המסעדות:"
+        if order and restaurant_data:
+            best = restaurant_data[0]
+            label = "הגבוה" if order == "desc" else "הנמוך"
+            window = f" {WINDOW_LABELS[route.window]}" if route.window else ""
+            answer = f"הסניף עם הציון הממוצע {label} ביותר{window} הוא {best['name']} ({best['average_score']:.2f})"
         return {
-            "answer": "נתוני המסעדות:",
+            "answer": answer,
             "data": restaurant_data,
             "query_type": "restaurants"
         }
     
-    def _handle_weekly_query(self, db: Session, question: str) -> Dict:
-        from datetime import datetime, timedelta
+    def _handle_weekly_query(self, db: Session, route: Route) -> Dict:
+        from datetime import timedelta
         
-        today = datetime.now()
+        today = rollup_service.today()
         week_start = today - timedelta(days=today.weekday())
         
-        weekly_records = db.query(FoodQuality).filter(
-            FoodQuality.created_at >= week_start
-        ).all()
+        score_sum, score_count = rollup_service.scope(db.query(
+            func.sum(FoodQualityDaily.score_sum),
+            func.sum(FoodQualityDaily.score_count)
+        ), route.restaurant_id, week_start).one()
         
-        if weekly_records:
-            avg_score = sum([r.score for r in weekly_records]) / len(weekly_records)
+        if score_count:
+            avg_score = score_sum / score_count
             return {
-                "answer": f"הציון הממוצע השבוע הוא {avg_score:.2f} ({len(weekly_records)} הערכות)",
-                "data": {"weekly_average": avg_score, "count": len(weekly_records)},
+                "answer": f"הציון הממוצע השבוע הוא {avg_score:.2f} ({score_count} הערכות)",
+                "data": {"weekly_average": avg_score, "count": score_count},
                 "query_type": "weekly"
             }
         else:
@@ -77,11 +191,117 @@ class KitchenAIService:
                 "query_type": "weekly"
             }
     
-    def _handle_general_query(self, db: Session, question: str) -> Dict:
+    def _handle_dish_query(self, db: Session, route: Route) -> Dict:
+        order = route.params.get("order", "best")
+        avg_score = func.sum(FoodQualityDaily.score_sum) / func.sum(FoodQualityDaily.score_count)
+        count = func.sum(FoodQualityDaily.score_count)
+        sort = {"best": avg_score.desc(), "worst": avg_score.asc(), "popular": count.desc()}[order]
+        
+        dishes = self._scoped(db.query(
+            FoodQualityDaily.dish_name, avg_score.label("avg_score"), count.label("count")
+        ), route).group_by(FoodQualityDaily.dish_name).order_by(sort).limit(5).all()
+        
+        if not dishes:
+            return {"answer": "לא נמצאו נתונים על מנות", "data": [], "query_type": "dishes"}
+        label = {"best": "עם הציון הגבוה ביותר", "worst": "עם הציון הנמוך ביותר", "popular": "הנפוצה ביותר"}[order]
+        return {
+            "answer": f"המנה {label} {self._describe(route)} היא {dishes[0].dish_name} ({float(dishes[0].avg_score):.2f}, {dishes[0].count} הערכות)",
+            "data": [
+                {"dish_name": d.dish_name, "average_score": float(d.avg_score), "count": d.count}
+                for d in dishes
+            ],
+            "query_type": "dishes"
+        }
+    
+    def _handle_chef_query(self, db: Session, route: Route) -> Dict:
+        order = route.params.get("order", "desc")
+        avg_score = func.sum(FoodQualityDaily.score_sum) / func.sum(FoodQualityDaily.score_count)
+        
+        query = self._scoped(db.query(
+            FoodQualityDaily.chef_id, Chef.name, avg_score.label("avg_score"),
+            func.sum(FoodQualityDaily.score_count).label("count")
+        ), route).outerjoin(Chef, Chef.id == FoodQualityDaily.chef_id).group_by(FoodQualityDaily.chef_id, Chef.name)
+        chefs = query.order_by(avg_score.desc() if order == "desc" else avg_score.asc()).limit(route.params.get("limit", 10)).all()
+        
+        if not chefs:
+            return {"answer": "לא נמצאו נתונים על שפים", "data": [], "query_type": "chefs"}
+        label = "הגבוה" if order == "desc" else "הנמוך"
+        return {
+            "answer": f"השף עם הציון הממוצע {label} ביותר {self._describe(route)} הוא {chefs[0].name or chefs[0].chef_id} ({float(chefs[0].avg_score):.2f})",
+            "data": [
+                {"chef_id": c.chef_id, "chef_name": c.name, "average_score": float(c.avg_score), "count": c.count}
+                for c in chefs
+            ],
+            "query_type": "chefs"
+        }
+    
+    def _handle_count_query(self, db: Session, route: Route) -> Dict:
+        score_count = self._scoped(db.query(func.sum(FoodQualityDaily.score_count)), route).scalar() or 0
+        scope = self._describe(route)
+        return {
+            "answer": f"מספר ההערכות {scope}: {score_count}" if scope else f"מספר ההערכות במערכת: {score_count}",
+            "data": {"count": score_count},
+            "query_type": "count"
+        }
+    
+    def _handle_trend_query(self, db: Session, route: Route) -> Dict:
+        data = chart_service.get_weekly_scores_chart_data(db, route.restaurant_id)
+        direction = "שיפור" if data["improvement"] > 0 else "ירידה" if data["improvement"] < 0 else "אין שינוי"
+        return {
+            "answer": f"{direction}: {data['current_week_average']:.2f} השבוע לעומת {data['previous_week_average']:.2f} בשבוע שעבר",
+            "data": data,
+            "query_type": "trend"
+        }
+    
+    def _handle_daily_trend_query(self, db: Session, route: Route) -> Dict:
+        data = chart_service.get_daily_trend_data(db, route.restaurant_id, 7)
+        return {
+            "answer": "הציון הממוצע לפי ימים בשבוע האחרון:",
+            "data": data,
+            "query_type": "daily_trend"
+        }
+    
+    def _handle_report_query(self, db: Session, route: Route) -> Dict:
+        period = route.params["period"]
+        data = report_service.build_period_report(db, period, route.params["buckets"], route.restaurant_id)
+        return {
+            "answer": "הדוח החודשי:" if period == "month" else "הדוח השבועי:",
+            "data": data,
+            "query_type": "report"
+        }
+    
+    def _handle_distribution_query(self, db: Session, route: Route) -> Dict:
+        score_sum, score_count, score_min, score_max, score_sq_sum = self._scoped(db.query(
+            func.sum(FoodQualityDaily.score_sum),
+            func.sum(FoodQualityDaily.score_count),
+            func.min(FoodQualityDaily.score_min),
+            func.max(FoodQualityDaily.score_max),
+            func.sum(FoodQualityDaily.score_sq_sum)
+        ), route).one()
+        if not score_count:
+            return {"answer": "לא נמצאו נתונים", "data": {}, "query_type": "distribution"}
+        
+        mean = score_sum / score_count
+        # Population variance from the rollup's running sums; clamp float noise below zero
+        std = max(score_sq_sum / score_count - mean * mean, 0) ** 0.5
+        return {
+            "answer": f"הציונים {self._describe(route)} נעים בין {score_min:.1f} ל-{score_max:.1f}, ממוצע {mean:.2f}, סטיית תקן {std:.2f}",
+            "data": {"min": score_min, "max": score_max, "average": mean, "std": std, "count": score_count},
+            "query_type": "distribution"
+        }
+    
+    def _handle_general_query(self, db: Session, route: Route) -> Dict:
+        topic = route.params.get("topic")
+        if topic == "greeting":
+            answer = "שלום! אפשר לשאול אותי על ציונים, מנות, שפים וסניפים."
+        elif topic == "thanks":
+            answer = "בשמחה!"
+        else:
+            answer = "אני יכול לעזור לך עם שאלות על ממוצעי ציונים, נתוני מסעדות, וסטטיסטיקות שבועיות."
         return {
-            "answer": "אני יכול לעזור לך עם שאלות על ממוצעי ציונים, נתוני מסעדות, וסטטיסטיקות שבועיות.",
+            "answer": answer,
             "data": {},
             "query_type": "general"
         }
 
-ai_service = KitchenAIService()
+ai_service = KitchenAIService()
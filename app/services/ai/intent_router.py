@@ -0,0 +1,265 @@
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+import re
+
+# Hebrew points and cantillation marks (U+0591-U+05C7), minus the maqaf and sof pasuq
+NIQQUD = re.compile("[֑-ֽֿ-ׂׄ-ׇ]")
+FINAL_LETTERS = str.maketrans("ךםןףץ", "כמנפצ")
+# Geresh/gershayim and ASCII quotes are part of abbreviations (רמה"ח), not word breaks
+ABBREVIATION_MARKS = re.compile("[\"'׳״`]")
+TOKEN = re.compile(r"\w+")
+# One-letter prefixes glued to the next word: ו (and), ה (the), ב (in), ל (to), מ (from), ש (that), כ (as)
+PREFIX_LETTERS = frozenset("והבלמשכ")
+MAX_PREFIX_LETTERS = 3
+
+def normalize(text: str) -> str:
+    text = NIQQUD.sub("", text).lower().translate(FINAL_LETTERS)
+    return " ".join(TOKEN.findall(ABBREVIATION_MARKS.sub("", text)))
+
+class KeywordAutomaton:
+    # Aho-Corasick over whole words: every phrase is found in one left-to-right pass
+    def __init__(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        self.vocabulary = set()
+
+    def add(self, phrase: str, payload):
+        tokens = normalize(phrase).split()
+        if not tokens:
+            return
+        state = 0
+        for token in tokens:
+            self.vocabulary.add(token)
+            next_state = self._goto[state].get(token)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][token] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = next_state
+        self._out[state].append((len(tokens), payload))
+
+    def compile(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(token, 0)
+                if self._fail[child] == child:
+                    self._fail[child] = 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+        return self
+
+    def iter_matches(self, tokens: List[str]):
+        # Yields (start, end, payload) for every phrase occurrence
+        state = 0
+        for end, token in enumerate(tokens, 1):
+            while state and token not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(token, 0)
+            for length, payload in self._out[state]:
+                yield end - length, end, payload
+
+# Subjects and qualifiers vote for every intent they can be part of, so
+# "המנה הכי טובה" (dish + best) lands on top_dishes with two votes.
+SUBJECTS = {
+    "restaurant": (
+        ["מסעדה", "מסעדות", "סניף", "סניפים", "restaurant", "restaurants", "branch", "branches"],
+        ["restaurants", "best_restaurant", "worst_restaurant"]
+    ),
+    "dish": (
+        ["מנה", "מנות", "מאכל", "dish", "dishes", "plate", "meal"],
+        ["top_dishes", "worst_dishes", "popular_dishes"]
+    ),
+    "chef": (
+        ["שף", "שפים", "טבח", "טבחים", "chef", "chefs", "cook", "cooks"],
+        ["chef_ranking", "top_chef", "worst_chef"]
+    ),
+}
+
+QUALIFIERS = {
+    "best": (
+        ["הכי טוב", "הכי טובה", "הכי טובות", "הטוב ביותר", "הטובה ביותר", "הטובות ביותר",
+         "הכי גבוה", "הגבוה ביותר", "מצטיין", "מצטיינת", "best", "top", "highest", "leading"],
+        ["best_restaurant", "top_dishes", "top_chef"]
+    ),
+    "worst": (
+        ["הכי חלש", "הכי חלשה", "הכי גרוע", "הכי גרועה", "הגרוע ביותר", "הכי נמוך", "הנמוך ביותר",
+         "חלש", "חלשה", "worst", "lowest", "weakest", "bottom"],
+        ["worst_restaurant", "worst_dishes", "worst_chef"]
+    ),
+    "popular": (
+        ["פופולרי", "פופולרית", "הכי נפוצה", "נפוץ", "שכיח", "הכי הרבה", "popular", "most common", "most frequent"],
+        ["popular_dishes"]
+    ),
+}
+
+# intent -> (handler, handler params, [(phrase, weight), ...]); earlier entries win ties
+INTENTS = {
+    "greeting": ("general", {"topic": "greeting"}, [("שלום", 1), ("היי", 1), ("בוקר טוב", 1), ("ערב טוב", 1), ("hello", 1), ("hi", 1), ("hey", 1)]),
+    "thanks": ("general", {"topic": "thanks"}, [("תודה", 1), ("תודה רבה", 1), ("thanks", 1), ("thank you", 1)]),
+    "help": ("general", {"topic": "help"}, [("עזרה", 1), ("מה אתה יודע", 2), ("מה אפשר לשאול", 2), ("help", 1), ("what can you do", 2)]),
+    # Bare subjects ("מסעדות", "chefs") tie across their family; the listing intent comes first
+    "restaurants": ("restaurants", {}, [("השוואה", 1), ("ביחס לאחרות", 2), ("לפי מסעדה", 2), ("compare", 1), ("comparison", 1), ("per restaurant", 2), ("by branch", 2)]),
+    "best_restaurant": ("restaurants", {"order": "desc", "limit": 1}, []),
+    "worst_restaurant": ("restaurants", {"order": "asc", "limit": 1}, []),
+    "top_dishes": ("dishes", {"order": "best"}, []),
+    "worst_dishes": ("dishes", {"order": "worst"}, []),
+    "popular_dishes": ("dishes", {"order": "popular"}, []),
+    "chef_ranking": ("chefs", {"order": "desc"}, [("דירוג", 1), ("ranking", 1), ("rank", 1)]),
+    "top_chef": ("chefs", {"order": "desc", "limit": 1}, []),
+    "worst_chef": ("chefs", {"order": "asc", "limit": 1}, []),
+    "daily_trend": ("daily_trend", {}, [("יומי", 2), ("יומית", 2), ("לפי ימים", 3), ("יום יום", 3), ("daily", 2), ("per day", 3), ("day by day", 3)]),
+    "trend": ("trend", {}, [("שיפור", 2), ("השתפר", 2), ("השתפרנו", 2), ("מגמה", 2), ("ירידה", 2), ("עלייה", 2),
+                           ("improvement", 2), ("improve", 2), ("improved", 2), ("trend", 2), ("better", 1), ("worse", 1)]),
+    "monthly_report": ("report", {"period": "month", "buckets": 6}, [("דוח חודשי", 3), ("חודשי", 2), ("monthly", 2), ("monthly report", 3)]),
+    "weekly_report": ("report", {"period": "week", "buckets": 4}, [("דוח שבועי", 3), ("שבועי", 2), ("weekly report", 3), ("weekly", 2)]),
+    "distribution": ("distribution", {}, [("טווח", 2), ("פיזור", 2), ("סטיית תקן", 3), ("עקביות", 2), ("עקבי", 2), ("מינימום", 2), ("מקסימום", 2),
+                                          ("range", 2), ("spread", 2), ("consistency", 2), ("consistent", 2), ("std", 2), ("min", 1), ("max", 1)]),
+    "count": ("count", {}, [("כמה", 1), ("כמות", 1), ("מספר", 1), ("how many", 2), ("count", 1), ("number of", 2),
+                            ("בדיקות", 1), ("טעימות", 1), ("הערכות", 1), ("tastings", 1)]),
+    "average": ("average", {}, [("ממוצע", 1), ("ממוצעת", 1), ("ממוצעים", 1), ("average", 1), ("avg", 1), ("mean", 1),
+                                ("ציון", 0.5), ("ציונים", 0.5), ("score", 0.5), ("scores", 0.5)]),
+}
+
+# window -> phrases; a time window on its own reads as "what was the average then"
+TIME_WINDOWS = {
+    "today": ["היום", "today"],
+    "yesterday": ["אתמול", "yesterday"],
+    "this_week": ["שבוע", "השבוע", "השבוע הזה", "ממוצע שבועי", "this week", "week", "weekly average"],
+    "last_week": ["שבוע שעבר", "בשבוע שעבר", "שבוע קודם", "השבוע הקודם", "last week", "previous week"],
+    "this_month": ["החודש", "חודש", "this month", "month"],
+    "last_month": ["חודש שעבר", "בחודש שעבר", "חודש קודם", "last month", "previous month"],
+}
+WINDOW_AVERAGE_VOTE = 0.5
+
+# (intent, window) pairs with a dedicated handler
+REFINEMENTS = {
+    ("average", "this_week"): "weekly",
+}
+
+FALLBACK_INTENT = "general"
+
+@dataclass
+class Route:
+    intent: str
+    handler: str
+    params: Dict = field(default_factory=dict)
+    restaurant_id: Optional[int] = None
+    chef_id: Optional[int] = None
+    dish_name: Optional[str] = None
+    window: Optional[str] = None
+    # Branches the asker may see; None means the whole chain
+    restaurant_ids: Optional[Tuple[int, ...]] = None
+
+    def key(self) -> Tuple:
+        # Everything the answer depends on; the question text itself is not part of it
+        return (self.intent, tuple(sorted(self.params.items())), self.restaurant_id, self.chef_id, self.dish_name, self.window, self.restaurant_ids)
+
+def window_range(window: Optional[str], today: date = None) -> Tuple[Optional[date], Optional[date]]:
+    # Half-open [start, end) day range, matching rollup_service.scope
+    if window is None:
+        return None, None
+    # UTC, like the rollup days these ranges are compared against
+    today = today or datetime.utcnow().date()
+    week_start = today - timedelta(days=today.weekday())
+    month_start = today.replace(day=1)
+    if window == "today":
+        return today, today + timedelta(days=1)
+    if window == "yesterday":
+        return today - timedelta(days=1), today
+    if window == "this_week":
+        return week_start, None
+    if window == "last_week":
+        return week_start - timedelta(days=7), week_start
+    if window == "this_month":
+        return month_start, None
+    if window == "last_month":
+        return (month_start - timedelta(days=1)).replace(day=1), month_start
+    raise ValueError(f"unknown time window: {window}")
+
+class IntentRouter:
+    def __init__(self):
+        self._priority = {intent: index for index, intent in enumerate(INTENTS)}
+        self.compile()
+
+    def compile(self, restaurants: Dict[str, int] = None, chefs: Dict[str, int] = None, dishes: Iterable[str] = None):
+        # Static vocabulary plus the current restaurant / chef / dish names, in one automaton
+        automaton = KeywordAutomaton()
+        for intent, (_, _, phrases) in INTENTS.items():
+            for phrase, weight in phrases:
+                automaton.add(phrase, ("intent", {intent: weight}))
+        for phrases, intents in list(SUBJECTS.values()) + list(QUALIFIERS.values()):
+            for phrase in phrases:
+                automaton.add(phrase, ("intent", {intent: 1 for intent in intents}))
+        for window, phrases in TIME_WINDOWS.items():
+            for phrase in phrases:
+                automaton.add(phrase, ("window", window))
+        for name, restaurant_id in (restaurants or {}).items():
+            automaton.add(name, ("restaurant", restaurant_id))
+        for name, chef_id in (chefs or {}).items():
+            automaton.add(name, ("chef", chef_id))
+        for dish in dishes or ():
+            automaton.add(dish, ("dish", dish))
+        self._automaton = automaton.compile()
+        return self
+
+    def tokens(self, question: str) -> List[str]:
+        vocabulary = self._automaton.vocabulary
+        tokens = []
+        for token in normalize(question).split():
+            # Peel glued prefix letters only when that reveals a word we know ("ובשבוע" -> "שבוע")
+            if token not in vocabulary:
+                for k in range(1, min(MAX_PREFIX_LETTERS, len(token) - 1) + 1):
+                    if token[k - 1] not in PREFIX_LETTERS:
+                        break
+                    if token[k:] in vocabulary:
+                        token = token[k:]
+                        break
+            tokens.append(token)
+        return tokens
+
+    def route(self, question: str) -> Route:
+        votes = {}
+        entities = {}
+        covered = (0, 0)
+        # Leftmost-longest: a phrase hidden inside a longer one ("שבוע" in "שבוע שעבר") does not count
+        matches = sorted(self._automaton.iter_matches(self.tokens(question)), key=lambda m: (m[0], m[0] - m[1]))
+        for start, end, (kind, value) in matches:
+            if start < covered[1] and (start, end) != covered:
+                continue
+            covered = (start, end)
+            if kind == "intent":
+                for intent, weight in value.items():
+                    votes[intent] = votes.get(intent, 0) + weight
+                continue
+            if kind == "window":
+                votes["average"] = votes.get("average", 0) + WINDOW_AVERAGE_VOTE
+            entities.setdefault(kind, value)
+
+        intent = FALLBACK_INTENT
+        if votes:
+            intent = max(votes, key=lambda name: (votes[name], -self._priority[name]))
+        window = entities.get("window")
+        intent = REFINEMENTS.get((intent, window), intent)
+        if intent in INTENTS:
+            handler, params, _ = INTENTS[intent]
+        else:
+            handler, params = intent, {}
+        return Route(
+            intent=intent,
+            handler=handler,
+            params=dict(params),
+            restaurant_id=entities.get("restaurant"),
+            chef_id=entities.get("chef"),
+            dish_name=entities.get("dish"),
+            window=window
+        )
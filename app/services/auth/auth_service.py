@@ -1,30 +1,108 @@
-﻿from sqlalchemy.orm import Session
+﻿from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 from passlib.context import CryptContext
-from jose import JWTError, jwt
+from jose import jwt
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from ..models.users.user import User
+from ...models.users.user import User
+from ...utils.cache import LRUTTLCache
+import asyncio
 import os
 
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# bcrypt releases the GIL, so threads give real parallelism; more workers than cores only adds queueing
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2)))
+# Hashes allowed in flight or waiting for a worker; beyond that, callers wait up to the timeout
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", str(PASSWORD_HASH_WORKERS * 4)))
+PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS = float(os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS", "5"))
+ACTIVE_USER_CACHE_SIZE = int(os.getenv("ACTIVE_USER_CACHE_SIZE", "4096"))
+# How long a deactivation made by another process can go unnoticed; this process drops its entry at once
+ACTIVE_USER_TTL_SECONDS = float(os.getenv("ACTIVE_USER_TTL_SECONDS", "60"))
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+_hash_slots = asyncio.Semaphore(PASSWORD_HASH_MAX_PENDING)
+
+# username -> is_active, so a token stops working once its user is deactivated or deleted
+_active_users = LRUTTLCache(ACTIVE_USER_CACHE_SIZE, ACTIVE_USER_TTL_SECONDS)
+
+class PasswordHashingBusy(Exception):
+    pass
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+async def _run_hash(fn, *args):
+    try:
+        await asyncio.wait_for(_hash_slots.acquire(), PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise PasswordHashingBusy()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, fn, *args)
+    finally:
+        _hash_slots.release()
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_hash(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_hash(get_password_hash, password)
+
+async def authenticate_user_async(db: AsyncSession, username: str, password: str):
+    user = (await db.scalars(select(User).where(User.username == username))).first()
+    if not user or not user.is_active:
+        return False
+    if not await verify_password_async(password, user.hashed_password):
+        return False
+    return user
+
 def authenticate_user(db: Session, username: str, password: str):
     user = db.query(User).filter(User.username == username).first()
-    if not user:
+    if not user or not user.is_active:
         return False
     if not verify_password(password, user.hashed_password):
         return False
     return user
 
+async def is_active_async(db: AsyncSession, username: str) -> bool:
+    active = _active_users.get(username)
+    if active is None:
+        active = bool((await db.scalars(select(User.is_active).where(User.username == username))).first())
+        _active_users.set(username, active)
+    return active
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_active_user(mapper, connection, target):
+    # A rename must also drop the entry under the old name
+    history = inspect(target).attrs.username.history
+    for username in [target.username, *(history.deleted or ())]:
+        _active_users.pop(username)
+
+@event.listens_for(Session, "do_orm_execute")
+def _invalidate_all_active_users(orm_execute_state):
+    # Bulk UPDATE/DELETE statements give no per-row targets
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and any(
+        mapper.class_ is User for mapper in orm_execute_state.all_mappers
+    ):
+        _active_users.clear()
+
+def token_claims(user: User) -> dict:
+    # Everything authorization needs rides in the signed token, so checking it costs no query
+    return {
+        "sub": user.username,
+        "role": user.role,
+        "restaurant_ids": [user.restaurant_id] if user.restaurant_id else []
+    }
+
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
     if expires_delta:
@@ -33,4 +111,30 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
         expire = datetime.utcnow() + timedelta(minutes=15)
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
+    return encoded_jwt
+
+if __name__ == "__main__":
+    # The image ships without a database, so accounts are created here:
+    # python -m app.services.auth.auth_service USERNAME headquarters|restaurant [RESTAURANT_ID]
+    # The password comes from KITCHEN_USER_PASSWORD, or is prompted for
+    import getpass
+    import sys
+    from ...database.database import SessionLocal
+    from ...models.chef_training import training
+    from ...models.food_quality import models
+    from ...models.tasks import task
+
+    if len(sys.argv) not in (3, 4) or sys.argv[2] not in ("headquarters", "restaurant"):
+        sys.exit("usage: python -m app.services.auth.auth_service USERNAME headquarters|restaurant [RESTAURANT_ID]")
+    username, role = sys.argv[1], sys.argv[2]
+    restaurant_id = int(sys.argv[3]) if len(sys.argv) == 4 else None
+    password = os.getenv("KITCHEN_USER_PASSWORD") or getpass.getpass(f"password for {username}: ")
+    with SessionLocal() as session:
+        user = session.query(User).filter(User.username == username).first() or User(username=username)
+        user.hashed_password = get_password_hash(password)
+        user.role = role
+        user.restaurant_id = restaurant_id
+        user.is_active = True
+        session.add(user)
+        session.commit()
+    print(f"user {username} saved")
@@ -1,49 +1,115 @@
-﻿from sqlalchemy.orm import Session
-from ..models.food_quality.models import FoodQuality
-from datetime import datetime, timedelta
+﻿from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+from ...models.food_quality.models import Chef, FoodQualityDaily
+from ..food_quality import rollup_service
+from ...utils.cache import payload_cache
+from datetime import date, timedelta
 from typing import Dict, List
 
-def get_weekly_scores_chart_data(db: Session, restaurant_id: int) -> Dict:
-    today = datetime.now()
+def _week_bounds():
+    today = rollup_service.today()
     current_week_start = today - timedelta(days=today.weekday())
     previous_week_start = current_week_start - timedelta(days=7)
+    return current_week_start, previous_week_start
+
+def _split_sums(column, boundary: date):
+    # Conditional aggregates: one pass yields the totals on both sides of `boundary`
+    current = func.coalesce(func.sum(case((FoodQualityDaily.day >= boundary, column), else_=0)), 0)
+    previous = func.coalesce(func.sum(case((FoodQualityDaily.day < boundary, column), else_=0)), 0)
+    return current, previous
+
+@payload_cache.cached("weekly_scores")
+def get_weekly_scores_chart_data(db: Session, restaurant_id: int) -> Dict:
+    current_week_start, previous_week_start = _week_bounds()
     
-    # Current week data
-    current_week_records = db.query(FoodQuality).filter(
-        FoodQuality.restaurant_id == restaurant_id,
-        FoodQuality.created_at >= current_week_start
-    ).all()
-    
-    # Previous week data
-    previous_week_records = db.query(FoodQuality).filter(
-        FoodQuality.restaurant_id == restaurant_id,
-        FoodQuality.created_at >= previous_week_start,
-        FoodQuality.created_at < current_week_start
-    ).all()
+    current_sum, previous_sum = _split_sums(FoodQualityDaily.score_sum, current_week_start)
+    current_count, previous_count = _split_sums(FoodQualityDaily.score_count, current_week_start)
+    totals = db.execute(rollup_service.scope(
+        select(current_sum, current_count, previous_sum, previous_count),
+        restaurant_id, previous_week_start
+    )).one()
     
-    current_avg = sum([r.score for r in current_week_records]) / len(current_week_records) if current_week_records else 0
-    previous_avg = sum([r.score for r in previous_week_records]) / len(previous_week_records) if previous_week_records else 0
+    current_avg = rollup_service.average(totals[0], totals[1])
+    previous_avg = rollup_service.average(totals[2], totals[3])
     
     return {
         "current_week_average": current_avg,
         "previous_week_average": previous_avg,
         "improvement": current_avg - previous_avg,
-        "current_week_records": len(current_week_records),
-        "previous_week_records": len(previous_week_records)
+        "current_week_records": totals[1],
+        "previous_week_records": totals[3]
     }
 
+@payload_cache.cached("daily_trend")
+def get_daily_trend_data(db: Session, restaurant_id: int, days: int = 14) -> List[Dict]:
+    today = rollup_service.today()
+    start = today - timedelta(days=days - 1)
+    
+    rows = db.execute(rollup_service.scope(
+        select(
+            FoodQualityDaily.day,
+            func.sum(FoodQualityDaily.score_sum),
+            func.sum(FoodQualityDaily.score_count)
+        ).group_by(FoodQualityDaily.day),
+        restaurant_id, start
+    )).all()
+    by_day = {row[0]: row for row in rows}
+    
+    # Days without tastings still get a point so the line has no gaps
+    trend = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        _, score_sum, score_count = by_day.get(day, (day, 0, 0))
+        trend.append({
+            "date": day.isoformat(),
+            "average_score": rollup_service.average(score_sum, score_count),
+            "count": score_count
+        })
+    return trend
+
+@payload_cache.cached("chef_breakdown")
+def get_chef_breakdown_data(db: Session, restaurant_id: int) -> List[Dict]:
+    current_week_start, previous_week_start = _week_bounds()
+    
+    current_sum, previous_sum = _split_sums(FoodQualityDaily.score_sum, current_week_start)
+    current_count, previous_count = _split_sums(FoodQualityDaily.score_count, current_week_start)
+    rows = db.execute(rollup_service.scope(
+        select(
+            FoodQualityDaily.chef_id, Chef.name,
+            current_sum, current_count, previous_sum, previous_count
+        ).outerjoin(Chef, Chef.id == FoodQualityDaily.chef_id).group_by(FoodQualityDaily.chef_id, Chef.name),
+        restaurant_id, previous_week_start
+    )).all()
+    
+    breakdown = []
+    for chef_id, name, cur_sum, cur_count, prev_sum, prev_count in rows:
+        current_avg = rollup_service.average(cur_sum, cur_count)
+        previous_avg = rollup_service.average(prev_sum, prev_count)
+        breakdown.append({
+            "chef_id": chef_id,
+            "chef_name": name,
+            "current_week_average": current_avg,
+            "previous_week_average": previous_avg,
+            "improvement": current_avg - previous_avg if cur_count and prev_count else 0,
+            "current_week_records": cur_count,
+            "previous_week_records": prev_count
+        })
+    breakdown.sort(key=lambda chef: chef["current_week_average"], reverse=True)
+    return breakdown
+
+@payload_cache.cached("top_dishes")
 def get_top_dishes_data(db: Session, restaurant_id: int) -> List[Dict]:
     # Get top 10 dishes by average score
-    from sqlalchemy import func
+    avg_score = func.sum(FoodQualityDaily.score_sum) / func.sum(FoodQualityDaily.score_count)
     
     top_dishes = db.query(
-        FoodQuality.dish_name,
-        func.avg(FoodQuality.score).label('avg_score'),
-        func.count(FoodQuality.id).label('count')
+        FoodQualityDaily.dish_name,
+        avg_score.label('avg_score'),
+        func.sum(FoodQualityDaily.score_count).label('count')
     ).filter(
-        FoodQuality.restaurant_id == restaurant_id
-    ).group_by(FoodQuality.dish_name).order_by(
-        func.avg(FoodQuality.score).desc()
+        FoodQualityDaily.restaurant_id == restaurant_id
+    ).group_by(FoodQualityDaily.dish_name).order_by(
+        avg_score.desc()
     ).limit(10).all()
     
     return [
@@ -53,4 +119,4 @@ def get_top_dishes_data(db: Session, restaurant_id: int) -> List[Dict]:
             "count": dish.count
         }
         for dish in top_dishes
-    ]
+    ]
@@ -0,0 +1,121 @@
+from sqlalchemy import and_, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from ...models.food_quality.models import FoodQuality
+from . import rollup_service
+from ..live import live_service
+from ..sync import sync_service
+from ...utils.cache import data_versions
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+import base64
+
+BULK_CHUNK_SIZE = 500
+STREAM_BATCH_SIZE = 1000
+
+RECORD_COLUMNS = (
+    FoodQuality.id,
+    FoodQuality.chef_id,
+    FoodQuality.dish_name,
+    FoodQuality.score,
+    FoodQuality.notes,
+    FoodQuality.restaurant_id,
+    FoodQuality.created_at
+)
+
+def _stamp(data: Dict) -> Dict:
+    # Fix created_at up front so the rollup day matches the stored row
+    if data.get("created_at") is None:
+        data = {**data, "created_at": datetime.utcnow()}
+    return data
+
+def create_record(db: Session, data: Dict) -> FoodQuality:
+    data = _stamp(data)
+    record = FoodQuality(**data)
+    db.add(record)
+    rollup_service.apply_rows(db, [data])
+    db.commit()
+    data_versions.bump([data.get("restaurant_id")])
+    db.refresh(record)
+    return record
+
+def insert_chunk(db: Session, rows: List[Dict]) -> List[int]:
+    # One executemany for the whole chunk; ids come back in parameter order
+    if not rows:
+        return []
+    rows = [_stamp(row) for row in rows]
+    ids = db.scalars(
+        insert(FoodQuality).returning(FoodQuality.id, sort_by_parameter_order=True),
+        rows
+    ).all()
+    rollup_service.apply_rows(db, rows)
+    # Core inserts skip the unit of work, so the change log hears about them here
+    sync_service.record(db.connection(), [(row.get("restaurant_id"), "food_quality", record_id, "u") for row, record_id in zip(rows, ids)])
+    live_service.collect(db, ({"id": record_id, **row} for row, record_id in zip(rows, ids)))
+    db.commit()
+    data_versions.bump(row.get("restaurant_id") for row in rows)
+    return list(ids)
+
+def bulk_insert(db: Session, rows: Iterable[Dict], chunk_size: int = BULK_CHUNK_SIZE) -> List[int]:
+    ids = []
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            ids.extend(insert_chunk(db, chunk))
+            chunk = []
+    ids.extend(insert_chunk(db, chunk))
+    return ids
+
+def encode_cursor(created_at: datetime, record_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{record_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    # Raises ValueError on anything that is not a cursor we issued
+    padded = cursor + "=" * (-len(cursor) % 4)
+    created_at, record_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+    return datetime.fromisoformat(created_at), int(record_id)
+
+def _keyset_query(restaurant_id: Optional[int], after: Optional[Tuple[datetime, int]]):
+    query = select(*RECORD_COLUMNS).order_by(FoodQuality.created_at, FoodQuality.id)
+    if restaurant_id:
+        query = query.where(FoodQuality.restaurant_id == restaurant_id)
+    if after:
+        created_at, record_id = after
+        query = query.where(or_(
+            FoodQuality.created_at > created_at,
+            and_(FoodQuality.created_at == created_at, FoodQuality.id > record_id)
+        ))
+    return query
+
+def serialize_record(row) -> Dict:
+    record = dict(row._mapping)
+    if record["created_at"] is not None:
+        record["created_at"] = record["created_at"].isoformat()
+    return record
+
+def get_records_page(db: Session, restaurant_id: Optional[int], limit: int,
+                     after: Optional[Tuple[datetime, int]] = None) -> Dict:
+    # Fetch one extra row to know whether another page exists
+    rows = db.execute(_keyset_query(restaurant_id, after).limit(limit + 1)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return {"items": [serialize_record(row) for row in rows], "next_cursor": next_cursor}
+
+def iter_records(db: Session, restaurant_id: Optional[int],
+                 after: Optional[Tuple[datetime, int]] = None,
+                 batch_size: int = STREAM_BATCH_SIZE) -> Iterator[Dict]:
+    # yield_per turns on stream_results, i.e. a server-side cursor where the driver supports one
+    result = db.execute(_keyset_query(restaurant_id, after).execution_options(yield_per=batch_size))
+    for row in result:
+        yield serialize_record(row)
+
+async def aiter_records(db: AsyncSession, restaurant_id: Optional[int],
+                        after: Optional[Tuple[datetime, int]] = None,
+                        batch_size: int = STREAM_BATCH_SIZE) -> AsyncIterator[Dict]:
+    result = await db.stream(_keyset_query(restaurant_id, after).execution_options(yield_per=batch_size))
+    async for row in result:
+        yield serialize_record(row)
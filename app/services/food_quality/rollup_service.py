@@ -0,0 +1,111 @@
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from ...models.food_quality.models import FoodQuality, FoodQualityDaily
+from datetime import date, datetime
+from typing import Dict, List
+
+ROLLUP_KEY = ("restaurant_id", "day", "chef_id", "dish_name")
+
+daily = FoodQualityDaily.__table__
+
+def _aggregate(rows: List[Dict]) -> List[Dict]:
+    # Collapse a batch to one upsert per rollup key before touching the table
+    buckets = {}
+    for row in rows:
+        key = (row.get("restaurant_id") or 0, row["created_at"].date(), row["chef_id"], row["dish_name"])
+        score = row["score"]
+        bucket = buckets.get(key)
+        if bucket is None:
+            buckets[key] = {
+                "restaurant_id": key[0], "day": key[1], "chef_id": key[2], "dish_name": key[3],
+                "score_sum": score, "score_count": 1,
+                "score_min": score, "score_max": score, "score_sq_sum": score * score
+            }
+        else:
+            bucket["score_sum"] += score
+            bucket["score_count"] += 1
+            bucket["score_min"] = min(bucket["score_min"], score)
+            bucket["score_max"] = max(bucket["score_max"], score)
+            bucket["score_sq_sum"] += score * score
+    return list(buckets.values())
+
+def _upsert_statement(dialect_name: str):
+    if dialect_name == "postgresql":
+        stmt = postgresql.insert(daily)
+        least, greatest = func.least, func.greatest
+    else:
+        # SQLite's two-argument min()/max() are scalar functions, not aggregates
+        stmt = sqlite.insert(daily)
+        least, greatest = func.min, func.max
+    excluded = stmt.excluded
+    return stmt.on_conflict_do_update(
+        index_elements=list(ROLLUP_KEY),
+        set_={
+            "score_sum": daily.c.score_sum + excluded.score_sum,
+            "score_count": daily.c.score_count + excluded.score_count,
+            "score_min": least(daily.c.score_min, excluded.score_min),
+            "score_max": greatest(daily.c.score_max, excluded.score_max),
+            "score_sq_sum": daily.c.score_sq_sum + excluded.score_sq_sum
+        }
+    )
+
+def apply_rows(db: Session, rows: List[Dict]):
+    # Runs inside the caller's transaction; the caller commits
+    buckets = _aggregate(rows)
+    if buckets:
+        db.execute(_upsert_statement(db.get_bind().dialect.name), buckets)
+
+def rebuild(db: Session) -> int:
+    # Full recompute from food_quality, for the initial backfill or after manual data fixes
+    day = func.date(FoodQuality.created_at)
+    source = select(
+        func.coalesce(FoodQuality.restaurant_id, 0),
+        day,
+        FoodQuality.chef_id,
+        FoodQuality.dish_name,
+        func.sum(FoodQuality.score),
+        func.count(FoodQuality.id),
+        func.min(FoodQuality.score),
+        func.max(FoodQuality.score),
+        func.sum(FoodQuality.score * FoodQuality.score)
+    ).where(
+        FoodQuality.created_at.isnot(None),
+        FoodQuality.chef_id.isnot(None),
+        FoodQuality.dish_name.isnot(None),
+        FoodQuality.score.isnot(None)
+    ).group_by(func.coalesce(FoodQuality.restaurant_id, 0), day, FoodQuality.chef_id, FoodQuality.dish_name)
+
+    db.execute(delete(daily))
+    db.execute(daily.insert().from_select([
+        "restaurant_id", "day", "chef_id", "dish_name",
+        "score_sum", "score_count", "score_min", "score_max", "score_sq_sum"
+    ], source))
+    db.commit()
+    return db.scalar(select(func.count()).select_from(daily))
+
+def today() -> date:
+    # Rollup days are the UTC date of created_at, so "today" and every window built on it must be too
+    return datetime.utcnow().date()
+
+def scope(query, restaurant_id: int = None, start: date = None, end: date = None):
+    # Days are half-open: start <= day < end
+    if restaurant_id:
+        query = query.where(FoodQualityDaily.restaurant_id == restaurant_id)
+    if start:
+        query = query.where(FoodQualityDaily.day >= start)
+    if end:
+        query = query.where(FoodQualityDaily.day < end)
+    return query
+
+def average(score_sum, score_count):
+    return score_sum / score_count if score_count else 0
+
+if __name__ == "__main__":
+    # Backfill / repair: python -m app.services.food_quality.rollup_service
+    from ...database.database import SessionLocal
+    from ...models.users import user
+    from ...models.tasks import task
+
+    with SessionLocal() as session:
+        print(f"food_quality_daily rebuilt: {rebuild(session)} rows")
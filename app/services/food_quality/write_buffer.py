@@ -0,0 +1,195 @@
+from collections import deque
+from contextlib import suppress
+from datetime import datetime
+from sqlalchemy.exc import SQLAlchemyError
+from typing import Dict, List, Optional
+from ...database.database import AsyncSessionLocal, recent_writers
+from . import food_quality_service
+import asyncio
+import logging
+import os
+import time
+
+# Opt-in group commit for single score submissions: rows wait here and share one transaction
+WRITE_BEHIND_ENABLED = os.getenv("FOOD_QUALITY_WRITE_BEHIND", "false").lower() in ("1", "true", "yes")
+WRITE_BUFFER_MAX_ROWS = int(os.getenv("WRITE_BUFFER_MAX_ROWS", "200"))
+WRITE_BUFFER_MAX_DELAY_MS = float(os.getenv("WRITE_BUFFER_MAX_DELAY_MS", "10"))
+# Rows waiting for the writer; beyond this submissions are refused rather than queued
+WRITE_BUFFER_MAX_PENDING = int(os.getenv("WRITE_BUFFER_MAX_PENDING", "10000"))
+
+logger = logging.getLogger(__name__)
+
+class WriteBufferFull(Exception):
+    pass
+
+class BatchMetrics:
+    def __init__(self, window: int = 1024):
+        self.batches = 0
+        self.rows = 0
+        self.failed_rows = 0
+        self.fallback_batches = 0
+        self.max_batch_size = 0
+        self.total_commit = 0.0
+        self.max_commit = 0.0
+        self._recent_commits = deque(maxlen=window)
+
+    def record(self, size: int, seconds: float, failed: int, fallback: bool):
+        self.batches += 1
+        self.rows += size
+        self.failed_rows += failed
+        self.fallback_batches += fallback
+        self.max_batch_size = max(self.max_batch_size, size)
+        self.total_commit += seconds
+        self.max_commit = max(self.max_commit, seconds)
+        self._recent_commits.append(seconds)
+
+    def stats(self) -> Dict:
+        recent = sorted(self._recent_commits)
+        def percentile(p):
+            return recent[min(len(recent) - 1, int(len(recent) * p))] * 1000 if recent else 0.0
+        return {
+            "batches": self.batches,
+            "rows": self.rows,
+            "failed_rows": self.failed_rows,
+            "fallback_batches": self.fallback_batches,
+            "avg_batch_size": self.rows / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "avg_commit_ms": self.total_commit / self.batches * 1000 if self.batches else 0.0,
+            "p99_commit_ms": percentile(0.99),
+            "max_commit_ms": self.max_commit * 1000
+        }
+
+class WriteBuffer:
+    # Callers await their row's future, which resolves only after the batch holding it commits
+    def __init__(self, session_factory=AsyncSessionLocal, max_rows: int = WRITE_BUFFER_MAX_ROWS,
+                 max_delay_ms: float = WRITE_BUFFER_MAX_DELAY_MS, max_pending: int = WRITE_BUFFER_MAX_PENDING):
+        self.session_factory = session_factory
+        self.max_rows = max_rows
+        self.max_delay = max_delay_ms / 1000
+        self.max_pending = max_pending
+        self.metrics = BatchMetrics()
+        self._pending = deque()
+        # Rows taken off _pending whose batch has not resolved yet
+        self._batch = ()
+        self._wakeup = None
+        self._writer = None
+        self._running = False
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def start(self):
+        if self._running:
+            return
+        self._wakeup = asyncio.Event()
+        self._running = True
+        self._spawn_writer()
+
+    def _spawn_writer(self):
+        self._writer = asyncio.create_task(self._run())
+        self._writer.add_done_callback(self._writer_done)
+
+    def _writer_done(self, task: asyncio.Task):
+        if task.cancelled() or task.exception() is None:
+            return
+        error = task.exception()
+        logger.error("write buffer writer crashed", exc_info=error)
+        # Nobody else will resolve these futures; without this their callers wait forever
+        failed = list(self._batch)
+        self._batch = ()
+        if self._running:
+            self._spawn_writer()
+        else:
+            failed.extend(self._pending)
+            self._pending.clear()
+        for _, _, _, future in failed:
+            if not future.done():
+                future.set_exception(error)
+
+    async def stop(self):
+        # Refuse new rows, then let the writer flush everything already accepted
+        if not self._running:
+            return
+        self._running = False
+        self._wakeup.set()
+        # A writer that crashed has already failed the rows it held (see _writer_done)
+        with suppress(Exception):
+            await self._writer
+        self._writer = None
+
+    async def submit(self, data: Dict, writer: Optional[str] = None) -> Dict:
+        if len(self._pending) >= self.max_pending:
+            raise WriteBufferFull()
+        loop = asyncio.get_running_loop()
+        # Stamped here so the acknowledged row carries the time it was accepted
+        row = {**data, "created_at": data.get("created_at") or datetime.utcnow()}
+        future = loop.create_future()
+        self._pending.append((row, writer, loop.time(), future))
+        if len(self._pending) == 1 or len(self._pending) >= self.max_rows:
+            self._wakeup.set()
+        return await asyncio.shield(future)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while self._running or self._pending:
+            if not self._pending:
+                await self._wait(None)
+                continue
+            wait = self._pending[0][2] + self.max_delay - loop.time()
+            if self._running and len(self._pending) < self.max_rows and wait > 0:
+                await self._wait(wait)
+                continue
+            self._batch = [self._pending.popleft() for _ in range(min(self.max_rows, len(self._pending)))]
+            await self._commit(self._batch)
+            self._batch = ()
+
+    async def _wait(self, timeout: Optional[float]):
+        self._wakeup.clear()
+        with suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+
+    async def _insert(self, rows: List[Dict]) -> List[int]:
+        async with self.session_factory() as db:
+            return await db.run_sync(food_quality_service.insert_chunk, rows)
+
+    async def _commit(self, batch):
+        started = time.perf_counter()
+        fallback = False
+        try:
+            results = await self._insert([row for row, *_ in batch])
+        except SQLAlchemyError:
+            # One bad row must not fail the rows that happened to share its batch
+            fallback = True
+            results = []
+            for row, *_ in batch:
+                try:
+                    results.extend(await self._insert([row]))
+                except Exception as e:
+                    # Driver errors that escaped wrapping, or a row that could not be built
+                    results.append(e)
+        except Exception as e:
+            results = [e] * len(batch)
+        failed = sum(isinstance(result, Exception) for result in results)
+        self.metrics.record(len(batch), time.perf_counter() - started, failed, fallback)
+
+        for (row, writer, _, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+                continue
+            if writer is not None:
+                recent_writers.set(writer, True)
+            future.set_result({"id": result, **row})
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": self._running,
+            "pending": len(self._pending),
+            "max_rows": self.max_rows,
+            "max_delay_ms": self.max_delay * 1000,
+            **self.metrics.stats()
+        }
+
+write_buffer = WriteBuffer()
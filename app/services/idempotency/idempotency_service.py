@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+from typing import List, NamedTuple, Optional, Tuple
+from ...models.idempotency.idempotency import IdempotencyKey
+from ...utils.cache import LRUTTLCache
+import asyncio
+import hashlib
+import json
+import logging
+import os
+
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", str(24 * 3600)))
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+# Only responses up to this size are kept in memory, so the cache stays under SIZE x this;
+# larger ones are replayed from the table
+IDEMPOTENCY_CACHE_MAX_BODY_BYTES = int(os.getenv("IDEMPOTENCY_CACHE_MAX_BODY_BYTES", "4096"))
+IDEMPOTENCY_PURGE_INTERVAL_SECONDS = float(os.getenv("IDEMPOTENCY_PURGE_INTERVAL_SECONDS", "3600"))
+
+logger = logging.getLogger(__name__)
+
+class StoredResponse(NamedTuple):
+    fingerprint: str
+    status_code: int
+    headers: List[Tuple[str, str]]
+    body: bytes
+    expires_at: datetime
+
+# Retries usually come back within seconds, so most replays never reach the table
+response_cache = LRUTTLCache(maxsize=IDEMPOTENCY_CACHE_SIZE, ttl=IDEMPOTENCY_TTL_SECONDS)
+
+def key_hash(client: str, key: str) -> str:
+    return hashlib.sha256(f"{client}\0{key}".encode()).hexdigest()
+
+def fingerprint(method: str, path: str, query_string: bytes, body_digest: bytes) -> str:
+    # body_digest is the sha256 of the request body, hashed as it streams in
+    return hashlib.sha256(b"\0".join([method.encode(), path.encode(), query_string, body_digest])).hexdigest()
+
+def load(db: Session, key: str) -> Optional[StoredResponse]:
+    row = db.scalars(select(IdempotencyKey).where(
+        IdempotencyKey.key_hash == key,
+        IdempotencyKey.expires_at > datetime.utcnow()
+    )).first()
+    if row is None:
+        return None
+    return StoredResponse(row.fingerprint, row.status_code, [tuple(h) for h in json.loads(row.headers)], row.body, row.expires_at)
+
+def save(db: Session, key: str, response: StoredResponse):
+    db.add(IdempotencyKey(
+        key_hash=key,
+        fingerprint=response.fingerprint,
+        status_code=response.status_code,
+        headers=json.dumps(response.headers),
+        body=response.body,
+        expires_at=response.expires_at
+    ))
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another machine stored the same key first; its response stands
+        db.rollback()
+
+def new_response(fingerprint: str, status_code: int, headers: List[Tuple[str, str]], body: bytes) -> StoredResponse:
+    return StoredResponse(fingerprint, status_code, headers, body, datetime.utcnow() + timedelta(seconds=IDEMPOTENCY_TTL_SECONDS))
+
+def remember(key: str, response: StoredResponse):
+    ttl = (response.expires_at - datetime.utcnow()).total_seconds()
+    if ttl > 0 and len(response.body) <= IDEMPOTENCY_CACHE_MAX_BODY_BYTES:
+        response_cache.set(key, response, ttl=ttl)
+
+def purge_expired(db: Session) -> int:
+    deleted = db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= datetime.utcnow())).rowcount
+    db.commit()
+    return deleted
+
+async def purge_expired_loop(session_factory, interval: float = IDEMPOTENCY_PURGE_INTERVAL_SECONDS):
+    while True:
+        try:
+            async with session_factory() as db:
+                await db.run_sync(purge_expired)
+        except SQLAlchemyError:
+            logger.exception("purging expired idempotency keys failed")
+        await asyncio.sleep(interval)
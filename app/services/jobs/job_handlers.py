@@ -0,0 +1,79 @@
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from typing import Dict, List
+from ...models.food_quality.models import FoodQuality
+from ..food_quality import food_quality_service
+from ..reports import report_service
+from .job_service import JobResult, remove_result_file, result_file
+import csv
+import io
+import json
+
+# Rows written between progress updates (and cancellation checks) in exports
+EXPORT_PROGRESS_EVERY = 1000
+
+def _csv_bytes(buffer: io.StringIO) -> bytes:
+    # The BOM makes Excel read the Hebrew dish names as UTF-8
+    return buffer.getvalue().encode("utf-8-sig")
+
+def _period_report(period: str):
+    def run(db: Session, context, params: Dict) -> JobResult:
+        context.progress(0, "בונה דוח")
+        report = report_service.build_period_report(db, period, params["buckets"], params["restaurant_id"])
+        return JobResult(json.dumps(report, ensure_ascii=False).encode(), "application/json")
+    return run
+
+def _write_report_csv(report: List[Dict]) -> io.StringIO:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["period", "period_start", "period_end", "average_score", "total_records", "top_dish", "improvement_trend"])
+    for row in report:
+        writer.writerow([
+            row["period"], row["periodStart"], row["periodEnd"], round(row["averageScore"], 2),
+            row["totalRecords"], row["topDish"], round(row["improvementTrend"], 1)
+        ])
+    return buffer
+
+def weekly_report_csv(db: Session, context, params: Dict) -> JobResult:
+    context.progress(0, "בונה דוח")
+    report = report_service.build_period_report(db, "week", params["buckets"], params["restaurant_id"])
+    name = f"weekly_report_{params['restaurant_id']}.csv"
+    return JobResult(_csv_bytes(_write_report_csv(report)), "text/csv; charset=utf-8", name)
+
+def food_quality_csv(db: Session, context, params: Dict) -> JobResult:
+    restaurant_id = params["restaurant_id"]
+    count = select(func.count()).select_from(FoodQuality)
+    if restaurant_id:
+        count = count.where(FoodQuality.restaurant_id == restaurant_id)
+    total = db.execute(count).scalar_one()
+
+    # Streamed to a file row by row, so the whole history is never held in memory
+    path = result_file(context.job_id, ".csv")
+    try:
+        # utf-8-sig writes the BOM that makes Excel read the Hebrew dish names as UTF-8
+        with open(path, "w", encoding="utf-8-sig", newline="") as out:
+            writer = None
+            written = 0
+            context.progress(0, f"0/{total}")
+            for record in food_quality_service.iter_records(db, restaurant_id):
+                if writer is None:
+                    writer = csv.DictWriter(out, fieldnames=list(record))
+                    writer.writeheader()
+                writer.writerow(record)
+                written += 1
+                if written % EXPORT_PROGRESS_EVERY == 0:
+                    # Rows inserted after the count can push past it; progress stays below 1 until done
+                    context.progress(min(written / total, 0.99) if total else 0, f"{written}/{total}")
+    except BaseException:
+        # Cancelled, failed or interrupted by shutdown: a half-written export is never served
+        remove_result_file(path)
+        raise
+    name = f"food_quality_{restaurant_id or 'all'}.csv"
+    return JobResult(None, "text/csv; charset=utf-8", name, path)
+
+HANDLERS = {
+    "weekly_report": _period_report("week"),
+    "monthly_report": _period_report("month"),
+    "weekly_report_csv": weekly_report_csv,
+    "food_quality_csv": food_quality_csv
+}
@@ -0,0 +1,191 @@
+from contextlib import suppress
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy.exc import SQLAlchemyError
+from typing import Dict, Optional
+from ...database.database import AsyncSessionLocal, SessionLocal
+from . import job_service
+from .job_handlers import HANDLERS
+from .job_service import CANCELLED, FAILED, SUCCEEDED
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+
+# Reports and exports run at most this many at a time, each on its own thread and connection
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# Jobs waiting for a worker; beyond this submissions are refused rather than queued
+JOB_MAX_QUEUED = int(os.getenv("JOB_MAX_QUEUED", "100"))
+# Progress is written at most this often per job, however often a handler reports it
+JOB_PROGRESS_INTERVAL_SECONDS = float(os.getenv("JOB_PROGRESS_INTERVAL_SECONDS", "0.5"))
+JOB_PURGE_INTERVAL_SECONDS = float(os.getenv("JOB_PURGE_INTERVAL_SECONDS", "3600"))
+# Running handlers get this long to reach a checkpoint on shutdown; the rest are requeued on the next start
+JOB_SHUTDOWN_TIMEOUT_SECONDS = float(os.getenv("JOB_SHUTDOWN_TIMEOUT_SECONDS", "10"))
+
+logger = logging.getLogger(__name__)
+
+class JobQueueFull(Exception):
+    pass
+
+class JobCancelled(Exception):
+    pass
+
+class JobContext:
+    # Handed to a handler on its worker thread. progress() doubles as the point where it stops
+    # when the job is cancelled or the process shuts down.
+    def __init__(self, runner: "JobRunner", job_id: str, cancel: threading.Event):
+        self.job_id = job_id
+        self._runner = runner
+        self._cancel = cancel
+        self._reported = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def progress(self, fraction: float, message: Optional[str] = None):
+        if self._cancel.is_set():
+            raise JobCancelled()
+        now = time.monotonic()
+        if self._reported is not None and now - self._reported < JOB_PROGRESS_INTERVAL_SECONDS:
+            return
+        self._reported = now
+        # Its own short transaction, so the handler's open read is left alone
+        with self._runner.session_factory() as db:
+            job_service.set_progress(db, self.job_id, fraction, message)
+
+class JobRunner:
+    # Queue and worker tasks live on the event loop; handlers are sync service code and run on a
+    # dedicated thread pool, so a long export never holds a request worker or the loop.
+    def __init__(self, handlers: Dict = HANDLERS, session_factory=SessionLocal, async_session_factory=AsyncSessionLocal,
+                 workers: int = JOB_WORKERS, max_queued: int = JOB_MAX_QUEUED):
+        self.handlers = handlers
+        self.session_factory = session_factory
+        self.async_session_factory = async_session_factory
+        self.workers = workers
+        self.max_queued = max_queued
+        self._queue = None
+        self._executor = None
+        self._tasks = []
+        self._active = {}
+        self._stopping = False
+        self.counts = {"submitted": 0, SUCCEEDED: 0, FAILED: 0, CANCELLED: 0, "requeued": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._queue is not None and not self._stopping
+
+    async def start(self):
+        if self._queue is not None:
+            return
+        self._stopping = False
+        self._queue = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+        # One runner per database: jobs a previous process left queued or half done start over here
+        try:
+            async with self.async_session_factory() as db:
+                for job_id in await db.run_sync(job_service.recover_jobs):
+                    self._queue.put_nowait(job_id)
+        except SQLAlchemyError:
+            # Typically a database not yet migrated to 0005; the rest of the app still serves
+            logger.exception("recovering unfinished jobs failed")
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._purge_loop()))
+
+    async def stop(self):
+        if self._queue is None:
+            return
+        self._stopping = True
+        for cancel in self._active.values():
+            cancel.set()
+        for task in self._tasks:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+        try:
+            await asyncio.wait_for(asyncio.to_thread(self._executor.shutdown), JOB_SHUTDOWN_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            logger.warning("jobs still running at shutdown; they are requeued on the next start")
+        self._tasks = []
+        self._queue = None
+        self._executor = None
+
+    async def submit(self, kind: str, params: Dict, owner: str, restaurant_id: Optional[int]) -> str:
+        if kind not in self.handlers:
+            raise ValueError(f"unknown job kind: {kind}")
+        if not self.running or self._queue.qsize() >= self.max_queued:
+            raise JobQueueFull()
+        async with self.async_session_factory() as db:
+            job_id = await db.run_sync(job_service.create_job, kind, params, owner, restaurant_id)
+        self._queue.put_nowait(job_id)
+        self.counts["submitted"] += 1
+        return job_id
+
+    async def cancel(self, job_id: str) -> bool:
+        # A running job stops at its next progress() call; a queued one never starts
+        cancel = self._active.get(job_id)
+        if cancel is not None:
+            cancel.set()
+            return True
+        async with self.async_session_factory() as db:
+            return await db.run_sync(job_service.cancel_queued, job_id)
+
+    async def _work(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job_id = await self._queue.get()
+            cancel = self._active[job_id] = threading.Event()
+            try:
+                status = await loop.run_in_executor(self._executor, self._execute, job_id, cancel)
+                if status:
+                    self.counts[status] += 1
+            except Exception:
+                logger.exception("job %s could not be run", job_id)
+            finally:
+                self._active.pop(job_id, None)
+
+    def _execute(self, job_id: str, cancel: threading.Event) -> Optional[str]:
+        with self.session_factory() as db:
+            job = job_service.start_job(db, job_id)
+            if job is None:
+                # Cancelled while it waited
+                return None
+            kind, params = job.kind, json.loads(job.params)
+            try:
+                result = self.handlers[kind](db, JobContext(self, job_id, cancel), params)
+            except JobCancelled:
+                db.rollback()
+                if self._stopping:
+                    job_service.requeue_job(db, job_id)
+                    return "requeued"
+                job_service.finish_job(db, job_id, CANCELLED)
+                return CANCELLED
+            except Exception:
+                db.rollback()
+                logger.exception("job %s (%s) failed", job_id, kind)
+                job_service.finish_job(db, job_id, FAILED, error="הפקת הדוח נכשלה")
+                return FAILED
+            job_service.finish_job(db, job_id, SUCCEEDED, result=result)
+            return SUCCEEDED
+
+    async def _purge_loop(self, interval: float = JOB_PURGE_INTERVAL_SECONDS):
+        while True:
+            try:
+                async with self.async_session_factory() as db:
+                    await db.run_sync(job_service.purge_expired)
+            except SQLAlchemyError:
+                logger.exception("purging expired jobs failed")
+            await asyncio.sleep(interval)
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": self.running,
+            "workers": self.workers,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "running": len(self._active),
+            "max_queued": self.max_queued,
+            **self.counts
+        }
+
+job_runner = JobRunner()
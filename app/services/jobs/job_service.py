@@ -0,0 +1,125 @@
+from datetime import datetime, timedelta
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session, defer
+from typing import Dict, List, NamedTuple, Optional
+from ...models.jobs.job import Job
+import json
+import logging
+import os
+import tempfile
+import uuid
+
+# How long a finished job, and the result it holds, can still be fetched
+JOB_RESULT_TTL_SECONDS = int(os.getenv("JOB_RESULT_TTL_SECONDS", str(24 * 3600)))
+# Where exports too large to keep in the table are spooled; must be local to the process serving them
+JOB_RESULT_DIR = os.getenv("JOB_RESULT_DIR") or os.path.join(tempfile.gettempdir(), "kitchen_jobs")
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = "queued", "running", "succeeded", "failed", "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+logger = logging.getLogger(__name__)
+
+class JobResult(NamedTuple):
+    # Either the payload itself or the path of a file holding it
+    content: Optional[bytes]
+    media_type: str
+    filename: Optional[str] = None
+    path: Optional[str] = None
+
+def result_file(job_id: str, suffix: str) -> str:
+    os.makedirs(JOB_RESULT_DIR, exist_ok=True)
+    return os.path.join(JOB_RESULT_DIR, f"{job_id}{suffix}")
+
+def remove_result_file(path: Optional[str]):
+    if not path:
+        return
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError:
+        logger.exception("could not remove job result %s", path)
+
+def create_job(db: Session, kind: str, params: Dict, owner: str, restaurant_id: Optional[int]) -> str:
+    job_id = uuid.uuid4().hex
+    db.add(Job(
+        id=job_id, kind=kind, params=json.dumps(params), status=QUEUED, progress=0,
+        owner=owner, restaurant_id=restaurant_id, created_at=datetime.utcnow()
+    ))
+    db.commit()
+    return job_id
+
+def get_job(db: Session, job_id: str, with_result: bool = False) -> Optional[Job]:
+    query = select(Job).where(Job.id == job_id)
+    if not with_result:
+        # Status polls are frequent; a large export stays on disk until someone downloads it
+        query = query.options(defer(Job.result))
+    return db.execute(query).scalar_one_or_none()
+
+def serialize_job(job: Job) -> Dict:
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "progress": round(job.progress, 3),
+        "message": job.message,
+        "restaurant_id": job.restaurant_id,
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "expires_at": job.expires_at.isoformat() if job.expires_at else None,
+        "result_url": f"/jobs/{job.id}/result" if job.status == SUCCEEDED else None
+    }
+
+def start_job(db: Session, job_id: str) -> Optional[Job]:
+    # Conditional on still being queued, so a job cancelled while it waited never runs
+    started = db.execute(
+        update(Job).where(Job.id == job_id, Job.status == QUEUED)
+        .values(status=RUNNING, started_at=datetime.utcnow())
+    ).rowcount
+    db.commit()
+    return db.get(Job, job_id) if started else None
+
+def set_progress(db: Session, job_id: str, progress: float, message: Optional[str] = None):
+    db.execute(update(Job).where(Job.id == job_id, Job.status == RUNNING).values(progress=progress, message=message))
+    db.commit()
+
+def finish_job(db: Session, job_id: str, status: str, result: Optional[JobResult] = None, error: Optional[str] = None):
+    now = datetime.utcnow()
+    values = {"status": status, "finished_at": now, "expires_at": now + timedelta(seconds=JOB_RESULT_TTL_SECONDS), "error": error}
+    if result is not None:
+        values.update(
+            progress=1, message=None, result=result.content, result_path=result.path,
+            result_type=result.media_type, result_name=result.filename
+        )
+    db.execute(update(Job).where(Job.id == job_id).values(**values))
+    db.commit()
+
+def requeue_job(db: Session, job_id: str):
+    db.execute(update(Job).where(Job.id == job_id).values(status=QUEUED, progress=0, message=None, started_at=None))
+    db.commit()
+
+def cancel_queued(db: Session, job_id: str) -> bool:
+    now = datetime.utcnow()
+    cancelled = db.execute(
+        update(Job).where(Job.id == job_id, Job.status == QUEUED)
+        .values(status=CANCELLED, finished_at=now, expires_at=now + timedelta(seconds=JOB_RESULT_TTL_SECONDS))
+    ).rowcount
+    db.commit()
+    return bool(cancelled)
+
+def recover_jobs(db: Session) -> List[str]:
+    # Whatever a previous process accepted and did not finish runs again; reports and exports only read
+    db.execute(update(Job).where(Job.status == RUNNING).values(status=QUEUED, progress=0, message=None, started_at=None))
+    db.commit()
+    return list(db.execute(select(Job.id).where(Job.status == QUEUED).order_by(Job.created_at)).scalars())
+
+def purge_expired(db: Session) -> int:
+    now = datetime.utcnow()
+    paths = list(db.execute(select(Job.result_path).where(Job.expires_at <= now, Job.result_path.is_not(None))).scalars())
+    deleted = db.execute(delete(Job).where(Job.expires_at <= now)).rowcount
+    db.commit()
+    for path in paths:
+        remove_result_file(path)
+    return deleted
@@ -0,0 +1,95 @@
+from collections import defaultdict
+from typing import Dict, Hashable
+import asyncio
+import os
+
+# Events a client may fall behind by before it is disconnected; it reconnects and refetches
+LIVE_QUEUE_SIZE = int(os.getenv("LIVE_QUEUE_SIZE", "100"))
+LIVE_MAX_SUBSCRIBERS = int(os.getenv("LIVE_MAX_SUBSCRIBERS", "1000"))
+
+class TooManySubscribers(Exception):
+    pass
+
+class Subscriber:
+    def __init__(self, topic: Hashable, maxsize: int):
+        self.topic = topic
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = False
+
+class Broadcaster:
+    # One fan-out point per process. publish() never waits on a client: a full queue means
+    # that client is too slow, and it is dropped instead of buffering without limit.
+    def __init__(self, queue_size: int = LIVE_QUEUE_SIZE, max_subscribers: int = LIVE_MAX_SUBSCRIBERS):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._topics = defaultdict(set)
+        self._loop = None
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(subscribers) for subscribers in self._topics.values())
+
+    def has_subscribers(self, topic: Hashable) -> bool:
+        return bool(self._topics.get(topic))
+
+    def subscribe(self, topic: Hashable) -> Subscriber:
+        if self.subscriber_count >= self.max_subscribers:
+            raise TooManySubscribers()
+        self._loop = asyncio.get_running_loop()
+        subscriber = Subscriber(topic, self.queue_size)
+        self._topics[topic].add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        subscribers = self._topics.get(subscriber.topic)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._topics[subscriber.topic]
+
+    def publish(self, topic: Hashable, event: Dict):
+        # Commits can happen on other threads (scripts, thread pools); hop onto the loop first
+        if self._loop is None or not self._topics.get(topic):
+            return
+        try:
+            on_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            self._publish(topic, event)
+        elif not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._publish, topic, event)
+
+    def _publish(self, topic: Hashable, event: Dict):
+        self.published += 1
+        for subscriber in list(self._topics.get(topic, ())):
+            try:
+                subscriber.queue.put_nowait(event)
+                self.delivered += 1
+            except asyncio.QueueFull:
+                self._drop(subscriber)
+
+    def _drop(self, subscriber: Subscriber):
+        self.dropped += 1
+        subscriber.dropped = True
+        self.unsubscribe(subscriber)
+        # Whatever it had not read yet is lost anyway; the None tells its stream to end
+        while not subscriber.queue.empty():
+            subscriber.queue.get_nowait()
+        subscriber.queue.put_nowait(None)
+
+    def stats(self) -> Dict:
+        return {
+            "subscribers": self.subscriber_count,
+            "topics": {str(topic): len(subscribers) for topic, subscribers in self._topics.items()},
+            "max_subscribers": self.max_subscribers,
+            "queue_size": self.queue_size,
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped_clients": self.dropped
+        }
+
+broadcaster = Broadcaster()
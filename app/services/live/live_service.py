@@ -0,0 +1,87 @@
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable
+from ...database.database import AsyncSessionLocal
+from ...models.food_quality.models import FoodQuality
+from ..charts import chart_service
+from .broadcaster import broadcaster
+import asyncio
+import logging
+import os
+
+# Topic of the chain-wide stream; branch streams use the restaurant id
+HEADQUARTERS = "headquarters"
+# Weekly averages are recomputed at most this often per branch, however many scores arrive
+LIVE_AGGREGATE_INTERVAL_SECONDS = float(os.getenv("LIVE_AGGREGATE_INTERVAL_SECONDS", "2"))
+
+logger = logging.getLogger(__name__)
+
+_RECORD_COLUMNS = [column.key for column in FoodQuality.__table__.columns]
+_stale_restaurants = set()
+
+def collect(session: Session, rows: Iterable[Dict]):
+    # Held on the session until commit; a rollback throws them away unseen
+    if broadcaster.subscriber_count:
+        session.info.setdefault("live_rows", []).extend(rows)
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed(session, flush_context):
+    # Unit-of-work inserts; bulk Core inserts call collect() themselves
+    if broadcaster.subscriber_count:
+        collect(session, [
+            {key: getattr(obj, key) for key in _RECORD_COLUMNS}
+            for obj in session.new if isinstance(obj, FoodQuality)
+        ])
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed(session):
+    rows = session.info.pop("live_rows", None)
+    if rows:
+        publish_scores(rows)
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_uncommitted(session, previous_transaction):
+    session.info.pop("live_rows", None)
+
+def _serialize(row: Dict) -> Dict:
+    return {key: value.isoformat() if isinstance(value, datetime) else value for key, value in row.items()}
+
+def publish_scores(rows: Iterable[Dict]):
+    # One event per commit and topic, so a bulk upload takes one queue slot, not one per row
+    by_restaurant = defaultdict(list)
+    for row in rows:
+        by_restaurant[row.get("restaurant_id")].append(_serialize(row))
+    for restaurant_id, scores in by_restaurant.items():
+        broadcaster.publish(restaurant_id, {"event": "scores", "data": scores})
+        if restaurant_id:
+            _stale_restaurants.add(restaurant_id)
+    broadcaster.publish(HEADQUARTERS, {"event": "scores", "data": [score for scores in by_restaurant.values() for score in scores]})
+
+async def refresh_aggregates(session_factory=AsyncSessionLocal):
+    global _stale_restaurants
+    stale, _stale_restaurants = _stale_restaurants, set()
+    headquarters = broadcaster.has_subscribers(HEADQUARTERS)
+    # Nobody watching a branch means nothing to compute for it
+    targets = sorted(r for r in stale if headquarters or broadcaster.has_subscribers(r))
+    if not targets:
+        return
+    async with session_factory() as db:
+        for restaurant_id in targets:
+            weekly = await db.run_sync(chart_service.get_weekly_scores_chart_data, restaurant_id)
+            message = {"event": "weekly", "data": {"restaurant_id": restaurant_id, **weekly}}
+            broadcaster.publish(restaurant_id, message)
+            broadcaster.publish(HEADQUARTERS, message)
+        if headquarters:
+            weekly = await db.run_sync(chart_service.get_weekly_scores_chart_data, None)
+            broadcaster.publish(HEADQUARTERS, {"event": "weekly", "data": {"restaurant_id": None, **weekly}})
+
+async def refresh_aggregates_loop(session_factory=AsyncSessionLocal, interval: float = LIVE_AGGREGATE_INTERVAL_SECONDS):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await refresh_aggregates(session_factory)
+        except SQLAlchemyError:
+            logger.exception("refreshing live weekly averages failed")
@@ -0,0 +1,105 @@
+from sqlalchemy import Date, Integer, cast, func, literal, literal_column, select
+from sqlalchemy.orm import Session
+from ...models.food_quality.models import FoodQualityDaily
+from ..food_quality import rollup_service
+from datetime import date, timedelta
+from typing import Dict, List
+
+PERIODS = ("week", "month")
+
+def _month_index(value) -> int:
+    return value.year * 12 + value.month - 1
+
+def _bucket_expression(dialect_name: str, period: str, anchor: date):
+    # Bucket 0 is the most recent period, 1 the one before it, and so on
+    day = FoodQualityDaily.day
+    if period == "week":
+        # Rolling 7-day windows, the first ending with `anchor` itself
+        if dialect_name == "postgresql":
+            days_ago = cast(literal(anchor, Date) - day, Integer)
+        else:
+            days_ago = cast(func.julianday(literal(anchor, Date)) - func.julianday(day), Integer)
+        return days_ago // 7
+    # Calendar months, the one containing `anchor` first
+    if dialect_name == "postgresql":
+        month_index = cast(func.extract("year", day) * 12 + func.extract("month", day), Integer) - 1
+    else:
+        month_index = cast(func.strftime("%Y", day), Integer) * 12 + cast(func.strftime("%m", day), Integer) - 1
+    return literal(_month_index(anchor)) - month_index
+
+def _bucket_range(period: str, anchor: date, bucket: int):
+    if period == "week":
+        end = anchor + timedelta(days=1) - timedelta(weeks=bucket)
+        return end - timedelta(days=7), end
+    index = _month_index(anchor) - bucket
+    start = date(index // 12, index % 12 + 1, 1)
+    end = date((index + 1) // 12, (index + 1) % 12 + 1, 1)
+    return start, end
+
+def _period_label(period: str, bucket: int, start: date) -> str:
+    if period == "week":
+        return f"שבוע {bucket + 1}"
+    return f"{start.month:02d}/{start.year}"
+
+def build_period_report(db: Session, period: str, buckets: int,
+                        restaurant_id: int = None, anchor: date = None) -> List[Dict]:
+    # Both include `anchor` (default today), like the per-record report they replaced:
+    # weekly buckets are the last 7 days up to and including it, monthly the current, partial month.
+    if period not in PERIODS:
+        raise ValueError(f"unknown report period: {period}")
+    anchor = anchor or rollup_service.today()
+
+    # One extra bucket so the oldest requested one still gets a trend
+    first_day, _ = _bucket_range(period, anchor, buckets)
+    last_day = _bucket_range(period, anchor, 0)[1]
+    bucket = _bucket_expression(db.get_bind().dialect.name, period, anchor).label("bucket")
+
+    per_dish = rollup_service.scope(
+        select(
+            bucket,
+            FoodQualityDaily.dish_name,
+            func.sum(FoodQualityDaily.score_sum).label("score_sum"),
+            func.sum(FoodQualityDaily.score_count).label("score_count")
+        # Group by the output alias so the bound anchor date is not repeated in GROUP BY
+        ).group_by(literal_column("bucket"), FoodQualityDaily.dish_name),
+        restaurant_id, first_day, last_day
+    ).cte("per_dish")
+
+    ranked = select(
+        per_dish.c.bucket,
+        per_dish.c.dish_name,
+        func.sum(per_dish.c.score_sum).over(partition_by=per_dish.c.bucket).label("bucket_sum"),
+        func.sum(per_dish.c.score_count).over(partition_by=per_dish.c.bucket).label("bucket_count"),
+        func.row_number().over(
+            partition_by=per_dish.c.bucket,
+            order_by=(per_dish.c.score_count.desc(), per_dish.c.dish_name)
+        ).label("dish_rank")
+    ).cte("ranked")
+
+    average = (ranked.c.bucket_sum / ranked.c.bucket_count).label("average")
+    summary = select(
+        ranked.c.bucket,
+        average,
+        ranked.c.bucket_count,
+        ranked.c.dish_name.label("top_dish"),
+        func.lag(average).over(order_by=ranked.c.bucket.desc()).label("previous_average")
+    ).where(ranked.c.dish_rank == 1).order_by(ranked.c.bucket)
+
+    report = []
+    for row in db.execute(summary):
+        if row.bucket >= buckets:
+            continue
+        start, end = _bucket_range(period, anchor, row.bucket)
+        trend = 0
+        if row.previous_average:
+            trend = (row.average - row.previous_average) / row.previous_average * 100
+        report.append({
+            "period": _period_label(period, row.bucket, start),
+            "periodStart": start.isoformat(),
+            "periodEnd": end.isoformat(),
+            "averageScore": row.average,
+            "totalRecords": row.bucket_count,
+            "topDish": row.top_dish,
+            "improvementTrend": trend
+        })
+    return report
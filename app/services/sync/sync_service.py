@@ -0,0 +1,126 @@
+from collections import defaultdict
+from datetime import date, datetime
+from sqlalchemy import event, insert, inspect, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, Optional, Tuple
+from ...models.chef_training.training import ChefTraining
+from ...models.food_quality.models import Chef, FoodQuality
+from ...models.sync.change_log import ChangeCursor, ChangeLog
+from ...models.tasks.task import Task
+import os
+
+SYNC_PAGE_SIZE = int(os.getenv("SYNC_PAGE_SIZE", "5000"))
+
+# Parents first, so a tablet applying a batch in this order never sees a dangling chef_id
+SYNC_TABLES = {
+    "chefs": Chef,
+    "chef_training": ChefTraining,
+    "tasks": Task,
+    "food_quality": FoodQuality
+}
+_TABLE_NAMES = {model: name for name, model in SYNC_TABLES.items()}
+
+def _allocate(connection: Connection, restaurant_id: int, count: int) -> int:
+    # Returns the last of `count` new seqs. The upsert keeps the cursor row locked until commit,
+    # so writers to one branch commit in seq order and a reader can never skip a late commit.
+    dialect_insert = postgresql.insert if connection.dialect.name == "postgresql" else sqlite.insert
+    statement = dialect_insert(ChangeCursor).values(restaurant_id=restaurant_id, seq=count)
+    statement = statement.on_conflict_do_update(
+        index_elements=[ChangeCursor.restaurant_id],
+        set_={"seq": ChangeCursor.seq + count}
+    ).returning(ChangeCursor.seq)
+    return connection.execute(statement).scalar_one()
+
+def record(connection: Connection, changes: Iterable[Tuple[Optional[int], str, int, str]]):
+    # changes: (restaurant_id, table_name, row_id, op) with op 'u' for insert/update, 'd' for delete
+    by_restaurant = defaultdict(list)
+    for restaurant_id, table_name, row_id, op in changes:
+        by_restaurant[restaurant_id or 0].append((table_name, row_id, op))
+    entries = []
+    # A fixed order of cursor locks, so two multi-branch transactions cannot deadlock
+    for restaurant_id in sorted(by_restaurant):
+        changed = by_restaurant[restaurant_id]
+        first = _allocate(connection, restaurant_id, len(changed)) - len(changed) + 1
+        entries.extend(
+            {"restaurant_id": restaurant_id, "seq": first + i, "table_name": table_name, "row_id": row_id, "op": op}
+            for i, (table_name, row_id, op) in enumerate(changed)
+        )
+    if entries:
+        connection.execute(insert(ChangeLog), entries)
+
+@event.listens_for(Session, "after_flush")
+def _log_flushed_changes(session, flush_context):
+    # Covers every unit-of-work write; bulk Core inserts call record() themselves
+    changes = []
+    for obj in session.new:
+        table_name = _TABLE_NAMES.get(type(obj))
+        if table_name:
+            changes.append((obj.restaurant_id, table_name, obj.id, "u"))
+    for obj in session.dirty:
+        table_name = _TABLE_NAMES.get(type(obj))
+        if not table_name or not session.is_modified(obj, include_collections=False):
+            continue
+        changes.append((obj.restaurant_id, table_name, obj.id, "u"))
+        # Moved to another branch: the old branch has to drop it
+        previous = inspect(obj).attrs.restaurant_id.history.deleted
+        if previous and previous[0] != obj.restaurant_id:
+            changes.append((previous[0], table_name, obj.id, "d"))
+    for obj in session.deleted:
+        table_name = _TABLE_NAMES.get(type(obj))
+        if table_name:
+            changes.append((obj.restaurant_id, table_name, obj.id, "d"))
+    if changes:
+        record(session.connection(), changes)
+
+def _serialize(row) -> Dict:
+    return {
+        key: value.isoformat() if isinstance(value, (date, datetime)) else value
+        for key, value in row._mapping.items()
+    }
+
+def get_changes(db: Session, restaurant_id: int, cursor: int, limit: int = SYNC_PAGE_SIZE) -> Dict:
+    current = db.get(ChangeCursor, restaurant_id)
+    if cursor > (current.seq if current else 0):
+        # A cursor from another database (or a restore); the tablet has to start over from 0
+        return {"restaurant_id": restaurant_id, "reset": True, "cursor": 0, "has_more": True, "changes": {}}
+
+    entries = db.execute(
+        select(ChangeLog.seq, ChangeLog.table_name, ChangeLog.row_id, ChangeLog.op)
+        .where(ChangeLog.restaurant_id == restaurant_id, ChangeLog.seq > cursor)
+        .order_by(ChangeLog.seq)
+        .limit(limit + 1)
+    ).all()
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    # Only the last change of each row within the page matters
+    latest = {}
+    for entry in entries:
+        latest[(entry.table_name, entry.row_id)] = entry.op
+    changes = {table_name: {"upserts": [], "deletes": []} for table_name in SYNC_TABLES}
+    upserts = defaultdict(list)
+    for (table_name, row_id), op in latest.items():
+        if op == "d":
+            changes[table_name]["deletes"].append(row_id)
+        else:
+            upserts[table_name].append(row_id)
+
+    for table_name, model in SYNC_TABLES.items():
+        if not upserts[table_name]:
+            continue
+        # A row moved to another branch since is left out; its delete entry follows
+        owner = model.restaurant_id == restaurant_id if restaurant_id else model.restaurant_id.is_(None)
+        rows = db.execute(
+            select(model.__table__).where(model.id.in_(upserts[table_name]), owner).order_by(model.id)
+        )
+        changes[table_name]["upserts"] = [_serialize(row) for row in rows]
+
+    return {
+        "restaurant_id": restaurant_id,
+        "reset": False,
+        "cursor": entries[-1].seq if entries else cursor,
+        "has_more": has_more,
+        "changes": changes
+    }
@@ -0,0 +1,139 @@
+from collections import OrderedDict, defaultdict
+from datetime import datetime
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional
+import os
+import threading
+import time
+
+PAYLOAD_CACHE_SIZE = int(os.getenv("PAYLOAD_CACHE_SIZE", "1024"))
+PAYLOAD_CACHE_TTL_SECONDS = float(os.getenv("PAYLOAD_CACHE_TTL_SECONDS", "300"))
+AI_ANSWER_CACHE_SIZE = int(os.getenv("AI_ANSWER_CACHE_SIZE", "2048"))
+AI_ANSWER_CACHE_TTL_SECONDS = float(os.getenv("AI_ANSWER_CACHE_TTL_SECONDS", "300"))
+
+_MISSING = object()
+
+def _hit_rate(hits: int, misses: int) -> float:
+    return hits / (hits + misses) if hits + misses else 0.0
+
+class LRUTTLCache:
+    # Bounded by entry count (least recently used goes first) and by age
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.pop(key, _MISSING)
+            return default if entry is _MISSING else entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class DataVersions:
+    # A counter per restaurant plus one for the whole chain. Cache keys embed the
+    # version, so bumping it makes every older entry unreachable at once.
+    CHAIN = None
+
+    def __init__(self):
+        self._versions = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def get(self, restaurant_id: Optional[int]) -> int:
+        return self._versions[restaurant_id or self.CHAIN]
+
+    def bump(self, restaurant_ids: Iterable[Optional[int]]):
+        with self._lock:
+            for restaurant_id in set(restaurant_ids):
+                if restaurant_id:
+                    self._versions[restaurant_id] += 1
+            self._versions[self.CHAIN] += 1
+
+    def bump_all(self):
+        # For changes that are not tied to known restaurants, e.g. a replica catching up
+        with self._lock:
+            for key in list(self._versions):
+                self._versions[key] += 1
+            self._versions[self.CHAIN] += 1
+
+class VersionedCache:
+    def __init__(self, versions: DataVersions, maxsize: int, ttl: float):
+        self.versions = versions
+        self._cache = LRUTTLCache(maxsize, ttl)
+        self._hits = defaultdict(int)
+        self._misses = defaultdict(int)
+
+    def get_or_set(self, endpoint: str, restaurant_id: Optional[int], params: Hashable, compute: Callable[[], Any]) -> Any:
+        # Payloads that depend on "this week" must not outlive the (UTC, as in the rollup) day they were built on
+        key = (endpoint, restaurant_id, params, datetime.utcnow().date(), self.versions.get(restaurant_id))
+        value = self._cache.get(key, _MISSING)
+        if value is not _MISSING:
+            self._hits[endpoint] += 1
+            return value
+        self._misses[endpoint] += 1
+        value = compute()
+        self._cache.set(key, value)
+        return value
+
+    def cached(self, endpoint: str):
+        # For functions shaped fn(db, restaurant_id, *params)
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(db, restaurant_id, *args, **kwargs):
+                params = (args, tuple(sorted(kwargs.items())))
+                return self.get_or_set(endpoint, restaurant_id, params, lambda: fn(db, restaurant_id, *args, **kwargs))
+            wrapper.uncached = fn
+            return wrapper
+        return decorator
+
+    def stats(self) -> Dict:
+        endpoints = sorted(set(self._hits) | set(self._misses))
+        hits = sum(self._hits.values())
+        misses = sum(self._misses.values())
+        return {
+            "entries": len(self._cache),
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": _hit_rate(hits, misses),
+            "endpoints": {
+                endpoint: {
+                    "hits": self._hits[endpoint],
+                    "misses": self._misses[endpoint],
+                    "hit_rate": _hit_rate(self._hits[endpoint], self._misses[endpoint])
+                }
+                for endpoint in endpoints
+            }
+        }
+
+    def clear(self):
+        self._cache.clear()
+
+data_versions = DataVersions()
+payload_cache = VersionedCache(data_versions, PAYLOAD_CACHE_SIZE, PAYLOAD_CACHE_TTL_SECONDS)
+# Keyed per intent, so its stats read as hit rates per intent
+answer_cache = VersionedCache(data_versions, AI_ANSWER_CACHE_SIZE, AI_ANSWER_CACHE_TTL_SECONDS)
@@ -0,0 +1,36 @@
+from collections import OrderedDict
+from typing import Hashable, Tuple
+import time
+
+class TokenBucketTable:
+    # One (tokens, updated_at) pair per key, least recently touched first. A bucket that has sat
+    # idle long enough to refill completely is indistinguishable from a new one, so it is dropped.
+    def __init__(self, rate: float, burst: float, maxsize: int = 100000):
+        self.rate = rate
+        self.burst = burst
+        self.maxsize = maxsize
+        self.idle_expiry = burst / rate if rate > 0 else float("inf")
+        self._buckets = OrderedDict()
+
+    def take(self, key: Hashable, cost: float = 1.0, now: float = None) -> Tuple[bool, float]:
+        # Returns (allowed, seconds until the request would be allowed)
+        now = time.monotonic() if now is None else now
+        tokens, updated_at = self._buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        self._buckets[key] = (tokens, now)
+        self._expire(now)
+        wait = 0.0 if allowed else ((cost - tokens) / self.rate if self.rate > 0 else float("inf"))
+        return allowed, wait
+
+    def _expire(self, now: float):
+        while self._buckets:
+            key, (_, updated_at) = next(iter(self._buckets.items()))
+            if now - updated_at < self.idle_expiry and len(self._buckets) <= self.maxsize:
+                break
+            self._buckets.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
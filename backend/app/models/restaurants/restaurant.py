@@ -1,20 +0,0 @@
-﻿from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Boolean, ForeignKey
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
-from datetime import datetime
-
-Base = declarative_base()
-
-class Restaurant(Base):
-    __tablename__ = "restaurants"
-    
-    id = Column(Integer, primary_key=True, index=True)
-    name = Column(String(100), unique=True, index=True)
-    location = Column(String(200))
-    created_at = Column(DateTime, default=datetime.utcnow)
-    
-    # Relationships
-    users = relationship("User", back_populates="restaurant")
-    chefs = relationship("Chef", back_populates="restaurant")
-    food_quality_records = relationship("FoodQuality", back_populates="restaurant")
-    tasks = relationship("Task", back_populates="restaurant")
@@ -1,18 +0,0 @@
-﻿from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey
-from sqlalchemy.orm import relationship
-from datetime import datetime
-from ..restaurants.restaurant import Base
-
-class User(Base):
-    __tablename__ = "users"
-    
-    id = Column(Integer, primary_key=True, index=True)
-    username = Column(String(50), unique=True, index=True)
-    hashed_password = Column(String(100))
-    role = Column(String(20))  # 'restaurant' or 'headquarters'
-    restaurant_id = Column(Integer, ForeignKey("restaurants.id"), nullable=True)
-    is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    
-    # Relationships
-    restaurant = relationship("Restaurant", back_populates="users")
@@ -0,0 +1,75 @@
+"""Authenticated requests per second with and without the active-user cache.
+
+Serves one branch-scoped endpoint behind AuthMiddleware, on a throwaway
+SQLite file. The token's claims are decoded once per token (the
+principal cache); what is measured is the per-request is_active check:
+
+    python -m benchmarks.bench_auth_cache --requests 3000
+"""
+import argparse
+import time
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.database.database import to_async_url
+from app.database.engine import build_async_engine
+from app.middleware.auth_middleware import AuthMiddleware, path_restaurant_scope
+from app.models.restaurants.restaurant import Restaurant
+from app.models.users.user import User
+from app.services.auth import auth_service
+from benchmarks.common import make_session_factory
+
+def make_app(async_session_factory) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/restaurants/{restaurant_id}/ping")
+    async def ping(restaurant_id: int = Depends(path_restaurant_scope)):
+        return {"ok": True}
+
+    app.add_middleware(AuthMiddleware, session_factory=async_session_factory)
+    return app
+
+def run(client: TestClient, token: str, requests: int, statements: list) -> float:
+    headers = {"Authorization": f"Bearer {token}"}
+    client.get("/restaurants/1/ping", headers=headers).raise_for_status()
+    statements.clear()
+    started = time.perf_counter()
+    for _ in range(requests):
+        client.get("/restaurants/1/ping", headers=headers)
+    elapsed = time.perf_counter() - started
+    return requests / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=3000)
+    args = parser.parse_args()
+
+    engine, SessionLocal = make_session_factory()
+    with SessionLocal() as db:
+        db.add(Restaurant(id=1, name="bench", location="bench"))
+        db.add(User(username="manager", hashed_password="-", role="restaurant", restaurant_id=1, is_active=True))
+        db.commit()
+
+    async_engine = build_async_engine(to_async_url(str(engine.url)), name="bench_async")
+    statements = []
+    event.listen(async_engine.sync_engine, "before_cursor_execute", lambda *a: statements.append(a[2]))
+    token = auth_service.create_access_token(auth_service.token_claims(
+        User(username="manager", role="restaurant", restaurant_id=1)
+    ))
+    client = TestClient(make_app(async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)))
+
+    active_users = auth_service._active_users
+    cache_size = active_users.maxsize
+    active_users.maxsize = 0
+    active_users.clear()
+    without = run(client, token, args.requests, statements)
+    print(f"without cache {without:>9.0f} req/s   {len(statements) / args.requests:.2f} statements/request")
+
+    active_users.maxsize = cache_size
+    with_cache = run(client, token, args.requests, statements)
+    print(f"with cache    {with_cache:>9.0f} req/s   {len(statements) / args.requests:.2f} statements/request")
+    print(f"speedup: {with_cache / without:.2f}x")
+
+if __name__ == "__main__":
+    main()
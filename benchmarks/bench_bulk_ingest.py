@@ -0,0 +1,56 @@
+"""Rows/second of the single-row create path versus the chunked bulk path.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_bulk_ingest --rows 2000
+"""
+import argparse
+import random
+import time
+from app.services.food_quality import food_quality_service
+from benchmarks.common import make_session_factory, seed_restaurants, report
+
+DISHES = ["פסטה", "סלט", "המבורגר", "סושי", "פיצה", "מרק"]
+
+def make_rows(chef_ids, count):
+    restaurant_ids = list(chef_ids)
+    rows = []
+    for _ in range(count):
+        restaurant_id = random.choice(restaurant_ids)
+        rows.append({
+            "chef_id": random.choice(chef_ids[restaurant_id]),
+            "dish_name": random.choice(DISHES),
+            "score": round(random.uniform(1, 10), 1),
+            "notes": None,
+            "restaurant_id": restaurant_id
+        })
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--chunk-size", type=int, default=food_quality_service.BULK_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    _, SessionLocal = make_session_factory()
+    with SessionLocal() as db:
+        chef_ids = seed_restaurants(db)
+    rows = make_rows(chef_ids, args.rows)
+
+    with SessionLocal() as db:
+        started = time.perf_counter()
+        for row in rows:
+            food_quality_service.create_record(db, row)
+        single = time.perf_counter() - started
+
+    with SessionLocal() as db:
+        started = time.perf_counter()
+        food_quality_service.bulk_insert(db, rows, chunk_size=args.chunk_size)
+        bulk = time.perf_counter() - started
+
+    report("single-row (add/commit)", len(rows), single)
+    report(f"bulk (chunk={args.chunk_size})", len(rows), bulk)
+    print(f"speedup: {single / bulk:.1f}x")
+
+if __name__ == "__main__":
+    main()
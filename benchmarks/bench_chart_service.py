@@ -0,0 +1,93 @@
+"""Latency and peak memory of the weekly chart payload, before and after.
+
+"before" is the original implementation: load every FoodQuality row of
+the current and previous week as ORM objects and average them in Python.
+"after" is chart_service.get_weekly_scores_chart_data: one
+conditional-aggregate query over food_quality_daily.
+
+    python -m benchmarks.bench_chart_service --rows 1000000
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+from app.models.food_quality.models import FoodQuality
+from app.services.charts import chart_service
+from app.services.food_quality import rollup_service
+from benchmarks.common import make_session_factory, seed_restaurants
+
+DISHES = ["פסטה", "סלט", "המבורגר", "סושי", "פיצה", "מרק", "שקשוקה", "פלאפל"]
+
+def legacy_weekly_scores(db, restaurant_id):
+    today = datetime.now()
+    current_week_start = today - timedelta(days=today.weekday())
+    previous_week_start = current_week_start - timedelta(days=7)
+    current = db.query(FoodQuality).filter(
+        FoodQuality.restaurant_id == restaurant_id,
+        FoodQuality.created_at >= current_week_start
+    ).all()
+    previous = db.query(FoodQuality).filter(
+        FoodQuality.restaurant_id == restaurant_id,
+        FoodQuality.created_at >= previous_week_start,
+        FoodQuality.created_at < current_week_start
+    ).all()
+    current_avg = sum([r.score for r in current]) / len(current) if current else 0
+    previous_avg = sum([r.score for r in previous]) / len(previous) if previous else 0
+    return current_avg, previous_avg, len(current), len(previous)
+
+def populate(SessionLocal, rows: int, days: int, restaurants: int):
+    with SessionLocal() as db:
+        chef_ids = seed_restaurants(db, restaurants=restaurants)
+        now = datetime.utcnow()
+        batch = []
+        for i in range(rows):
+            restaurant_id = random.choice(list(chef_ids))
+            batch.append({
+                "chef_id": random.choice(chef_ids[restaurant_id]),
+                "dish_name": random.choice(DISHES),
+                "score": round(random.uniform(1, 10), 1),
+                "restaurant_id": restaurant_id,
+                "created_at": now - timedelta(seconds=random.randint(0, days * 86400))
+            })
+            if len(batch) == 50000:
+                db.execute(insert(FoodQuality), batch)
+                batch = []
+        if batch:
+            db.execute(insert(FoodQuality), batch)
+        db.commit()
+        rollup_service.rebuild(db)
+        return next(iter(chef_ids))
+
+def measure(label, fn, repeat):
+    fn()  # warm the page cache and the statement cache
+    tracemalloc.start()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = (time.perf_counter() - started) / repeat
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<10} {elapsed * 1000:>10.2f} ms/call   peak {peak / 1024 / 1024:>8.2f} MiB")
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--restaurants", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    _, SessionLocal = make_session_factory()
+    print(f"populating {args.rows} rows over {args.days} days...")
+    restaurant_id = populate(SessionLocal, args.rows, args.days, args.restaurants)
+
+    with SessionLocal() as db:
+        before = measure("before", lambda: (legacy_weekly_scores(db, restaurant_id), db.expunge_all()), args.repeat)
+        after = measure("after", lambda: chart_service.get_weekly_scores_chart_data(db, restaurant_id), args.repeat)
+    print(f"speedup: {before / after:.0f}x")
+
+if __name__ == "__main__":
+    main()
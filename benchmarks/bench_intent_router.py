@@ -0,0 +1,60 @@
+"""Classification throughput of the compiled intent router.
+
+Routes a corpus of Hebrew and English questions (including the
+suggestions the AI endpoint hands out) against a gazetteer of a few
+hundred restaurant, chef and dish names. No database is involved:
+
+    python -m benchmarks.bench_intent_router --repeat 2000
+"""
+import argparse
+import time
+from app.services.ai.intent_router import IntentRouter
+
+QUESTIONS = [
+    "מה הציון הממוצע השבוע?",
+    "איך המסעדה שלי מתאימה ביחס לאחרות?",
+    "מה המנה עם הציון הגבוה ביותר?",
+    "האם יש שיפור השבוע?",
+    "מה הציון הממוצע בשבוע שעבר?",
+    "איזה סניף הכי טוב החודש?",
+    "מי השף הכי גרוע?",
+    "כמה הערכות היו אתמול?",
+    "מה המנה הכי פופולרית בסניף 12?",
+    "תן לי דוח חודשי",
+    "מגמה יומית",
+    "what is the average score of pasta today?",
+    "which restaurant is the worst?",
+    "show me the top chefs last month",
+    "hello",
+    "תודה רבה!",
+]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--names", type=int, default=300)
+    args = parser.parse_args()
+
+    router = IntentRouter()
+    started = time.perf_counter()
+    router.compile(
+        {f"סניף {i}": i for i in range(1, args.names + 1)},
+        {f"שף {i}": i for i in range(1, args.names + 1)},
+        ["פסטה", "pasta", "סלט", "המבורגר", "סושי"] + [f"מנה {i}" for i in range(args.names)],
+    )
+    print(f"compile   {(time.perf_counter() - started) * 1000:>8.2f} ms")
+
+    for question in QUESTIONS:
+        route = router.route(question)
+        print(f"  {route.intent:<18} {question}")
+
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        for question in QUESTIONS:
+            router.route(question)
+    elapsed = time.perf_counter() - started
+    total = args.repeat * len(QUESTIONS)
+    print(f"route     {total / elapsed:>8.0f} questions/s   {elapsed / total * 1e6:.1f} us/question")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Latency of a cheap endpoint during a storm of logins.
+
+"before" is POST /auth/token as it used to be: bcrypt verification
+called straight from the async handler, on the event loop. "after" is
+the real auth router, which verifies on the bounded bcrypt pool. Both
+apps run in-process over ASGI against the same SQLite file:
+
+    python -m benchmarks.bench_login_storm --logins 4 --probes 50
+"""
+import argparse
+import asyncio
+import time
+import httpx
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from app.database.database import get_db, to_async_url
+from app.database.engine import build_async_engine
+from app.models.users.user import User
+from app.routes.auth import auth_routes
+from app.routes.restaurants import restaurant_routes
+from app.services.auth import auth_service
+from benchmarks.bench_event_loop_latency import summarize
+from benchmarks.common import make_session_factory, seed_restaurants
+
+PASSWORD = "shift-start-1234"
+
+def make_app(url: str, blocking: bool) -> FastAPI:
+    app = FastAPI()
+    app.include_router(restaurant_routes.router)
+    AsyncSessionLocal = async_sessionmaker(build_async_engine(to_async_url(url), name=f"bench_{blocking}"), expire_on_commit=False)
+
+    async def get_async_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    if blocking:
+        @app.post("/auth/token")
+        async def login(form_data: OAuth2PasswordRequestForm = Depends(), db=Depends(get_db)):
+            user = await db.run_sync(auth_service.authenticate_user, form_data.username, form_data.password)
+            if not user:
+                raise HTTPException(status_code=401)
+            return {"access_token": auth_service.create_access_token({"sub": user.username})}
+    else:
+        app.include_router(auth_routes.router)
+
+    app.dependency_overrides[get_db] = get_async_db
+    return app
+
+async def run(app: FastAPI, restaurant_id: int, logins: int, probes: int):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        stop = asyncio.Event()
+        completed = 0
+
+        async def login_load():
+            nonlocal completed
+            while not stop.is_set():
+                response = await client.post("/auth/token", data={"username": "chef", "password": PASSWORD})
+                completed += response.status_code == 200
+
+        workers = [asyncio.create_task(login_load()) for _ in range(logins)]
+        await asyncio.sleep(0.2)
+        started = time.perf_counter()
+        latencies = []
+        for _ in range(probes):
+            probe_started = time.perf_counter()
+            response = await client.get(f"/restaurants/{restaurant_id}")
+            latencies.append(time.perf_counter() - probe_started)
+            response.raise_for_status()
+            await asyncio.sleep(0.005)
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await asyncio.gather(*workers)
+    print(f"         {completed / elapsed:.1f} logins/s completed alongside the probes")
+    return latencies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=4, help="concurrent login loops")
+    parser.add_argument("--probes", type=int, default=50)
+    args = parser.parse_args()
+
+    engine, SessionLocal = make_session_factory()
+    with SessionLocal() as db:
+        restaurant_id = next(iter(seed_restaurants(db, restaurants=1, chefs_per_restaurant=0)))
+        db.add(User(username="chef", hashed_password=auth_service.get_password_hash(PASSWORD), role="restaurant", restaurant_id=restaurant_id))
+        db.commit()
+    url = engine.url.render_as_string(hide_password=False)
+
+    before = summarize("before", asyncio.run(run(make_app(url, blocking=True), restaurant_id, args.logins, args.probes)))
+    after = summarize("after", asyncio.run(run(make_app(url, blocking=False), restaurant_id, args.logins, args.probes)))
+    print(f"p99 improvement: {before / after:.1f}x")
+
+if __name__ == "__main__":
+    main()
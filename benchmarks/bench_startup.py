@@ -0,0 +1,120 @@
+"""Cold start and resident memory: two stacks versus the unified app.
+
+"before" is what a machine used to run: the Flask main.py from the
+baseline commit under gunicorn (1 worker, 2 threads, as its Dockerfile
+did), plus a uvicorn process serving the FastAPI routers. "after" is
+the single uvicorn process of app.main, which serves the login page,
+/api/login and /api/status itself. Each start is timed from spawn until
+/api/status answers; RSS is summed over the process tree after a warm-up
+request:
+
+    python -m benchmarks.bench_startup --runs 5
+    python -m benchmarks.bench_startup --baseline <commit>
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def tree_rss_kb(pid: int) -> int:
+    # gunicorn forks its worker; count the master and every descendant
+    children = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            except OSError:
+                continue
+            children.setdefault(ppid, []).append(int(entry))
+    total, pending = 0, [pid]
+    while pending:
+        current = pending.pop()
+        pending.extend(children.get(current, []))
+        try:
+            with open(f"/proc/{current}/status") as f:
+                total += next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+        except (OSError, StopIteration):
+            pass
+    return total
+
+def start(cmd, port: int, cwd: str, timeout: float = 60):
+    env = dict(os.environ, PORT=str(port), PYTHONPATH=cwd)
+    started = time.perf_counter()
+    process = subprocess.Popen(cmd, cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}/api/status"
+    while True:
+        try:
+            urllib.request.urlopen(url, timeout=1).read()
+            break
+        except OSError:
+            if process.poll() is not None or time.perf_counter() - started > timeout:
+                process.kill()
+                raise RuntimeError(f"{' '.join(cmd)} did not come up")
+            time.sleep(0.01)
+    return process, time.perf_counter() - started
+
+def stop(process):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+def measure(commands):
+    # Started one after another; the machine is ready when the slowest would be if started together
+    processes, seconds = [], []
+    try:
+        for cmd, cwd in commands:
+            port = free_port()
+            cmd = [part.format(port=port) for part in cmd]
+            process, elapsed = start(cmd, port, cwd)
+            processes.append(process)
+            seconds.append(elapsed)
+        return max(seconds), sum(tree_rss_kb(p.pid) for p in processes)
+    finally:
+        for process in processes:
+            stop(process)
+
+def summarize(label: str, runs):
+    startup = statistics.median(s for s, _ in runs)
+    rss = statistics.median(r for _, r in runs)
+    print(f"{label:<8} startup {startup * 1000:>8.0f} ms   rss {rss / 1024:>8.1f} MiB")
+    return startup, rss
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--baseline", default=None, help="commit holding the Flask main.py (default: the root commit)")
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    baseline = args.baseline or subprocess.check_output(
+        ["git", "rev-list", "--max-parents=0", "HEAD"], cwd=root, text=True).split()[0]
+    flask_dir = tempfile.mkdtemp(prefix="bench_flask_")
+    with open(os.path.join(flask_dir, "main.py"), "wb") as f:
+        f.write(subprocess.check_output(["git", "show", f"{baseline}:main.py"], cwd=root))
+
+    uvicorn = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", "{port}", "--workers", "1"]
+    gunicorn = [sys.executable, "-m", "gunicorn", "--bind", "127.0.0.1:{port}", "--workers", "1", "--threads", "2", "main:app"]
+
+    before = [measure([(gunicorn, flask_dir), (uvicorn, root)]) for _ in range(args.runs)]
+    after = [measure([(uvicorn, root)]) for _ in range(args.runs)]
+
+    before_startup, before_rss = summarize("before", before)
+    after_startup, after_rss = summarize("after", after)
+    print(f"startup {before_startup / after_startup:.2f}x, memory saved {(before_rss - after_rss) / 1024:.1f} MiB")
+
+if __name__ == "__main__":
+    main()
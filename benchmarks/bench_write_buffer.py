@@ -0,0 +1,88 @@
+"""Single-row score submissions: one transaction each versus group commit.
+
+Many concurrent clients each submit rows one at a time, the way branch
+tablets post tastings. "before" commits every row on its own session,
+as create_food_quality_record does by default. "after" goes through the
+write-behind buffer, so rows that arrive together share one transaction
+and each caller is answered only once its batch has committed. Both run
+against the same throwaway SQLite file unless --url points elsewhere:
+
+    python -m benchmarks.bench_write_buffer --clients 50 --rows 2000
+    SQLITE_SYNCHRONOUS=FULL python -m benchmarks.bench_write_buffer
+"""
+import argparse
+import asyncio
+import time
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from app.database.database import to_async_url
+from app.database.engine import build_async_engine
+from app.models.food_quality.models import FoodQuality
+from app.services.food_quality import food_quality_service
+from app.services.food_quality.write_buffer import WriteBuffer
+from benchmarks.bench_event_loop_latency import summarize
+from benchmarks.common import make_session_factory, seed_restaurants
+
+async def run(submit, clients: int, rows: int, chef_ids):
+    restaurant_id, chefs = next(iter(chef_ids.items()))
+    latencies = []
+
+    async def client(worker: int):
+        for i in range(worker, rows, clients):
+            started = time.perf_counter()
+            await submit({
+                "chef_id": chefs[i % len(chefs)],
+                "dish_name": f"dish-{i % 40}",
+                "score": 1 + i % 10,
+                "notes": None,
+                "restaurant_id": restaurant_id
+            })
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(w) for w in range(clients)))
+    return time.perf_counter() - started, latencies
+
+async def compare(url: str, clients: int, rows: int, chef_ids, max_rows: int, max_delay_ms: float):
+    AsyncSessionLocal = async_sessionmaker(build_async_engine(to_async_url(url), name="bench_async"), expire_on_commit=False)
+
+    async def direct(data):
+        async with AsyncSessionLocal() as db:
+            await db.run_sync(food_quality_service.create_record, data)
+
+    seconds, latencies = await run(direct, clients, rows, chef_ids)
+    print(f"before: {rows / seconds:>8.0f} rows/s")
+    before = summarize("before", latencies)
+
+    buffer = WriteBuffer(AsyncSessionLocal, max_rows=max_rows, max_delay_ms=max_delay_ms)
+    buffer.start()
+    seconds, latencies = await run(buffer.submit, clients, rows, chef_ids)
+    await buffer.stop()
+    print(f"after:  {rows / seconds:>8.0f} rows/s")
+    after = summarize("after", latencies)
+    stats = buffer.stats()
+    print(f"batches {stats['batches']}, avg size {stats['avg_batch_size']:.1f}, "
+          f"avg commit {stats['avg_commit_ms']:.2f} ms, p99 commit {stats['p99_commit_ms']:.2f} ms")
+    print(f"p99 improvement: {before / after:.1f}x")
+
+    async with AsyncSessionLocal() as db:
+        stored = await db.scalar(select(func.count()).select_from(FoodQuality))
+    assert stored == rows * 2, f"expected {rows * 2} rows, found {stored}"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--max-rows", type=int, default=200)
+    parser.add_argument("--max-delay-ms", type=float, default=10)
+    parser.add_argument("--url", help="sync SQLAlchemy URL of an empty database to fill")
+    args = parser.parse_args()
+
+    engine, SessionLocal = make_session_factory(args.url)
+    with SessionLocal() as db:
+        chef_ids = seed_restaurants(db)
+    url = engine.url.render_as_string(hide_password=False)
+    asyncio.run(compare(url, args.clients, args.rows, chef_ids, args.max_rows, args.max_delay_ms))
+
+if __name__ == "__main__":
+    main()
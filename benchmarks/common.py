@@ -0,0 +1,37 @@
+import os
+import tempfile
+from sqlalchemy.orm import sessionmaker
+from app.database.engine import build_engine
+from app.models.restaurants.restaurant import Base, Restaurant
+from app.models.users.user import User
+from app.models.tasks.task import Task
+from app.models.food_quality.models import FoodQuality, Chef
+
+def make_session_factory(url: str = None):
+    # A throwaway SQLite file, tuned by the same engine factory as production
+    if url is None:
+        fd, path = tempfile.mkstemp(suffix=".db", prefix="bench_")
+        os.close(fd)
+        url = f"sqlite:///{path}"
+    engine = build_engine(url, name="bench")
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def seed_restaurants(db, restaurants: int = 3, chefs_per_restaurant: int = 4):
+    chef_ids = {}
+    for r in range(restaurants):
+        restaurant = Restaurant(name=f"bench-{r}", location="bench")
+        db.add(restaurant)
+        db.flush()
+        chef_ids[restaurant.id] = []
+        for c in range(chefs_per_restaurant):
+            chef = Chef(name=f"chef-{r}-{c}", restaurant_id=restaurant.id)
+            db.add(chef)
+            db.flush()
+            chef_ids[restaurant.id].append(chef.id)
+    db.commit()
+    return chef_ids
+
+def report(label: str, rows: int, seconds: float):
+    rate = rows / seconds if seconds else float("inf")
+    print(f"{label:<28} {rows:>9} rows  {seconds:>8.3f}s  {rate:>12.0f} rows/s")
@@ -0,0 +1,156 @@
+"""Baseline schema: the core tables, and chef_id on food_quality for databases from the Flask app
+
+Revision ID: 0000
+Revises:
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+import json
+import os
+
+
+revision = "0000"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+INITIAL_RESTAURANTS = os.path.join(os.path.dirname(__file__), "..", "..", "data", "initial_restaurants.json")
+
+
+def _create_missing_tables(inspector):
+    # Databases made by metadata.create_all() or by the old Flask app already have some or all of these
+    if not inspector.has_table("restaurants"):
+        op.create_table(
+            "restaurants",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("name", sa.String(length=100), nullable=True),
+            sa.Column("location", sa.String(length=200), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_restaurants_id", "restaurants", ["id"])
+        op.create_index("ix_restaurants_name", "restaurants", ["name"], unique=True)
+    if not inspector.has_table("users"):
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("username", sa.String(length=50), nullable=True),
+            sa.Column("hashed_password", sa.String(length=100), nullable=True),
+            sa.Column("role", sa.String(length=20), nullable=True),
+            sa.Column("restaurant_id", sa.Integer(), nullable=True),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["restaurant_id"], ["restaurants.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_users_id", "users", ["id"])
+        op.create_index("ix_users_username", "users", ["username"], unique=True)
+    if not inspector.has_table("chefs"):
+        op.create_table(
+            "chefs",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("name", sa.String(length=100), nullable=True),
+            sa.Column("restaurant_id", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["restaurant_id"], ["restaurants.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_chefs_id", "chefs", ["id"])
+    if not inspector.has_table("food_quality"):
+        # 0001 adds the analytics indexes
+        op.create_table(
+            "food_quality",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("chef_id", sa.Integer(), nullable=True),
+            sa.Column("dish_name", sa.String(length=100), nullable=True),
+            sa.Column("score", sa.Float(), nullable=True),
+            sa.Column("notes", sa.Text(), nullable=True),
+            sa.Column("restaurant_id", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["chef_id"], ["chefs.id"]),
+            sa.ForeignKeyConstraint(["restaurant_id"], ["restaurants.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_food_quality_id", "food_quality", ["id"])
+    if not inspector.has_table("tasks"):
+        op.create_table(
+            "tasks",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("title", sa.String(length=200), nullable=True),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("completed", sa.Boolean(), nullable=True),
+            sa.Column("due_date", sa.DateTime(), nullable=True),
+            sa.Column("restaurant_id", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("task_type", sa.String(length=50), nullable=True),
+            sa.ForeignKeyConstraint(["restaurant_id"], ["restaurants.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_tasks_id", "tasks", ["id"])
+    if not inspector.has_table("chef_training"):
+        op.create_table(
+            "chef_training",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("chef_id", sa.Integer(), nullable=True),
+            sa.Column("training_title", sa.String(length=200), nullable=True),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("completed", sa.Boolean(), nullable=True),
+            sa.Column("completed_date", sa.DateTime(), nullable=True),
+            sa.Column("restaurant_id", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["chef_id"], ["chefs.id"]),
+            sa.ForeignKeyConstraint(["restaurant_id"], ["restaurants.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_chef_training_id", "chef_training", ["id"])
+
+
+def _link_chefs_by_name():
+    # The Flask app stored the chef's name on each score; the API keys scores by chefs.id.
+    # Every (name, branch) pair becomes a chef, then each score points at its chef.
+    op.add_column("food_quality", sa.Column("chef_id", sa.Integer(), nullable=True))
+    op.execute("""
+        INSERT INTO chefs (name, restaurant_id, created_at)
+        SELECT DISTINCT fq.chef_name, fq.restaurant_id, CURRENT_TIMESTAMP
+        FROM food_quality fq
+        WHERE fq.chef_name IS NOT NULL AND NOT EXISTS (
+            SELECT 1 FROM chefs c
+            WHERE c.name = fq.chef_name AND COALESCE(c.restaurant_id, 0) = COALESCE(fq.restaurant_id, 0)
+        )
+    """)
+    op.execute("""
+        UPDATE food_quality SET chef_id = (
+            SELECT MIN(c.id) FROM chefs c
+            WHERE c.name = food_quality.chef_name
+              AND COALESCE(c.restaurant_id, 0) = COALESCE(food_quality.restaurant_id, 0)
+        )
+        WHERE chef_name IS NOT NULL
+    """)
+
+
+def _seed_restaurants():
+    # A brand-new database starts with the chain's branches
+    if op.get_bind().execute(sa.text("SELECT COUNT(*) FROM restaurants")).scalar():
+        return
+    with open(INITIAL_RESTAURANTS, encoding="utf-8-sig") as f:
+        names = json.load(f)["restaurants"]
+    restaurants = sa.table("restaurants", sa.column("name", sa.String))
+    op.bulk_insert(restaurants, [{"name": name} for name in names])
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    legacy_food_quality = inspector.has_table("food_quality") and "chef_id" not in {
+        column["name"] for column in inspector.get_columns("food_quality")
+    }
+    _create_missing_tables(inspector)
+    if legacy_food_quality:
+        # chef_name is left in place; the API no longer reads it
+        _link_chefs_by_name()
+    _seed_restaurants()
+
+
+def downgrade():
+    # The baseline is where the history starts; there is nothing older to go back to
+    pass
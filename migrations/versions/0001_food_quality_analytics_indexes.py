@@ -0,0 +1,47 @@
+"""Composite indexes for the food_quality analytics access patterns
+
+Revision ID: 0001
+Revises: 0000
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = "0000"
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ("ix_food_quality_restaurant_created", ["restaurant_id", "created_at"]),
+    ("ix_food_quality_restaurant_dish", ["restaurant_id", "dish_name"]),
+    ("ix_food_quality_chef_created", ["chef_id", "created_at"]),
+)
+
+
+def _existing_indexes():
+    inspector = sa.inspect(op.get_bind())
+    return {index["name"] for index in inspector.get_indexes("food_quality")}
+
+
+def _existing_columns():
+    inspector = sa.inspect(op.get_bind())
+    return {column["name"] for column in inspector.get_columns("food_quality")}
+
+
+def upgrade():
+    # Databases created with metadata.create_all() already carry these. An index whose columns
+    # are not there yet is skipped rather than failing the whole upgrade.
+    existing = _existing_indexes()
+    columns_present = _existing_columns()
+    for name, columns in INDEXES:
+        if name not in existing and columns_present.issuperset(columns):
+            op.create_index(name, "food_quality", columns)
+
+
+def downgrade():
+    existing = _existing_indexes()
+    for name, _ in INDEXES:
+        if name in existing:
+            op.drop_index(name, table_name="food_quality")
@@ -0,0 +1,52 @@
+"""food_quality_daily rollup table
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    # Databases created with metadata.create_all() already have it, and the rollup is kept current
+    if inspector.has_table("food_quality_daily"):
+        return
+    op.create_table(
+        "food_quality_daily",
+        sa.Column("restaurant_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("chef_id", sa.Integer(), nullable=False),
+        sa.Column("dish_name", sa.String(length=100), nullable=False),
+        sa.Column("score_sum", sa.Float(), nullable=False),
+        sa.Column("score_count", sa.Integer(), nullable=False),
+        sa.Column("score_min", sa.Float(), nullable=True),
+        sa.Column("score_max", sa.Float(), nullable=True),
+        sa.Column("score_sq_sum", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("restaurant_id", "day", "chef_id", "dish_name"),
+    )
+    if not inspector.has_table("food_quality"):
+        return
+    # Same backfill as `python -m app.services.food_quality.rollup_service`
+    op.execute("""
+        INSERT INTO food_quality_daily
+            (restaurant_id, day, chef_id, dish_name,
+             score_sum, score_count, score_min, score_max, score_sq_sum)
+        SELECT COALESCE(restaurant_id, 0), date(created_at), chef_id, dish_name,
+               SUM(score), COUNT(id), MIN(score), MAX(score), SUM(score * score)
+        FROM food_quality
+        WHERE created_at IS NOT NULL AND chef_id IS NOT NULL
+          AND dish_name IS NOT NULL AND score IS NOT NULL
+        GROUP BY COALESCE(restaurant_id, 0), date(created_at), chef_id, dish_name
+    """)
+
+
+def downgrade():
+    op.drop_table("food_quality_daily")
@@ -0,0 +1,72 @@
+"""change_log and change_cursors for delta sync
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+SOURCE_TABLES = ("chefs", "chef_training", "tasks", "food_quality")
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    # Databases created with metadata.create_all() already have both, and log every write since
+    if inspector.has_table("change_log"):
+        return
+    op.create_table(
+        "change_log",
+        sa.Column("restaurant_id", sa.Integer(), nullable=False),
+        sa.Column("seq", sa.Integer(), nullable=False),
+        sa.Column("table_name", sa.String(length=32), nullable=False),
+        sa.Column("row_id", sa.Integer(), nullable=False),
+        sa.Column("op", sa.String(length=1), nullable=False),
+        sa.PrimaryKeyConstraint("restaurant_id", "seq"),
+        sqlite_with_rowid=False,
+    )
+    if op.get_bind().dialect.name == "postgresql":
+        op.create_index(
+            "ix_change_log_cursor", "change_log", ["restaurant_id", "seq"],
+            postgresql_include=["table_name", "row_id", "op"]
+        )
+    op.create_table(
+        "change_cursors",
+        sa.Column("restaurant_id", sa.Integer(), nullable=False),
+        sa.Column("seq", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("restaurant_id"),
+    )
+    if not all(inspector.has_table(name) for name in SOURCE_TABLES):
+        return
+    # Existing rows become the first entries, so a tablet starting from cursor 0 gets everything.
+    # Parents first: chefs before the trainings and tastings that point at them.
+    op.execute("""
+        INSERT INTO change_log (restaurant_id, seq, table_name, row_id, op)
+        SELECT restaurant_id,
+               ROW_NUMBER() OVER (PARTITION BY restaurant_id ORDER BY table_order, row_id),
+               table_name, row_id, 'u'
+        FROM (
+            SELECT COALESCE(restaurant_id, 0) AS restaurant_id, 1 AS table_order, 'chefs' AS table_name, id AS row_id FROM chefs
+            UNION ALL SELECT COALESCE(restaurant_id, 0), 2, 'chef_training', id FROM chef_training
+            UNION ALL SELECT COALESCE(restaurant_id, 0), 3, 'tasks', id FROM tasks
+            UNION ALL SELECT COALESCE(restaurant_id, 0), 4, 'food_quality', id FROM food_quality
+        ) AS existing
+    """)
+    op.execute("""
+        INSERT INTO change_cursors (restaurant_id, seq)
+        SELECT restaurant_id, MAX(seq) FROM change_log GROUP BY restaurant_id
+    """)
+
+
+def downgrade():
+    op.drop_table("change_cursors")
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_index("ix_change_log_cursor", table_name="change_log")
+    op.drop_table("change_log")
@@ -0,0 +1,31 @@
+"""jobs.result_path for exports spooled to disk
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def _has_column():
+    inspector = sa.inspect(op.get_bind())
+    return any(column["name"] == "result_path" for column in inspector.get_columns("jobs"))
+
+
+def upgrade():
+    # Databases created with metadata.create_all() already have it
+    if not _has_column():
+        op.add_column("jobs", sa.Column("result_path", sa.String(length=500), nullable=True))
+
+
+def downgrade():
+    if _has_column():
+        with op.batch_alter_table("jobs") as batch_op:
+            batch_op.drop_column("result_path")
@@ -0,0 +1,70 @@
+import os
+import tempfile
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy.orm import sessionmaker
+from app.database.engine import build_engine
+from app.models.restaurants.restaurant import Base, Restaurant
+from app.models.users.user import User
+from app.models.tasks.task import Task
+from app.models.chef_training.training import ChefTraining
+from app.models.food_quality.models import FoodQuality, Chef
+from app.models.jobs.job import Job
+from app.models.idempotency.idempotency import IdempotencyKey
+from app.models.sync.change_log import ChangeLog
+from app.services.food_quality import food_quality_service
+from app.utils.cache import answer_cache, payload_cache
+
+# Enough branches that a per-branch query would show up in the statement counts
+RESTAURANTS = 25
+SCORED_RESTAURANTS = 20
+
+@pytest.fixture(scope="session")
+def engine():
+    # A throwaway SQLite file, tuned by the same engine factory as production;
+    # TEST_DATABASE_URL points the suite at an empty Postgres database instead
+    url = os.getenv("TEST_DATABASE_URL")
+    path = None
+    if url is None:
+        fd, path = tempfile.mkstemp(suffix=".db", prefix="test_")
+        os.close(fd)
+        url = f"sqlite:///{path}"
+    engine = build_engine(url, name="test")
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+    if path:
+        os.remove(path)
+
+@pytest.fixture(scope="session")
+def SessionLocal(engine):
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with SessionLocal() as db:
+        chef_ids = {}
+        for r in range(RESTAURANTS):
+            restaurant = Restaurant(name=f"test-{r}", location="test")
+            db.add(restaurant)
+            db.flush()
+            chef = Chef(name=f"chef-{r}", restaurant_id=restaurant.id)
+            db.add(chef)
+            db.flush()
+            chef_ids[restaurant.id] = chef.id
+        db.commit()
+        # Two weeks of scores, so the weekly and daily charts have something on both sides
+        now = datetime.utcnow()
+        food_quality_service.bulk_insert(db, [
+            {"chef_id": chef_id, "dish_name": dish, "score": score, "restaurant_id": restaurant_id,
+             "created_at": now - timedelta(days=days_ago)}
+            for restaurant_id, chef_id in list(chef_ids.items())[:SCORED_RESTAURANTS]
+            for days_ago in range(14)
+            for dish, score in (("פסטה", 8.0), ("סלט", 7.0))
+        ])
+    return SessionLocal
+
+@pytest.fixture
+def db(SessionLocal):
+    answer_cache.clear()
+    payload_cache.clear()
+    with SessionLocal() as db:
+        yield db
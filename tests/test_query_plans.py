@@ -0,0 +1,90 @@
+"""The statements the analytics code issues for one branch are served by an
+index on food_quality_daily (or food_quality, for the records listing),
+never by a full table scan.
+
+Statements are captured as the app runs them, then replayed with their own
+parameters under EXPLAIN QUERY PLAN on SQLite and EXPLAIN on Postgres."""
+import pytest
+from sqlalchemy import event
+from app.services.ai.ai_service import ai_service
+from app.services.charts import chart_service
+from app.services.food_quality import food_quality_service
+from app.services.reports import report_service
+
+RESTAURANT_ID = 1
+SCANNED_TABLES = ("food_quality", "food_quality_daily")
+
+def _records_second_page(db, restaurant_id):
+    page = food_quality_service.get_records_page(db, restaurant_id, 5)
+    return food_quality_service.get_records_page(
+        db, restaurant_id, 5, food_quality_service.decode_cursor(page["next_cursor"])
+    )
+
+CALLS = {
+    "weekly scores chart": lambda db, rid: chart_service.get_weekly_scores_chart_data(db, rid),
+    "daily trend chart": lambda db, rid: chart_service.get_daily_trend_data(db, rid, 14),
+    "chef breakdown chart": lambda db, rid: chart_service.get_chef_breakdown_data(db, rid),
+    "top dishes chart": lambda db, rid: chart_service.get_top_dishes_data(db, rid),
+    "weekly report": lambda db, rid: report_service.build_period_report(db, "week", 4, rid),
+    "monthly report": lambda db, rid: report_service.build_period_report(db, "month", 6, rid),
+    "records page": lambda db, rid: food_quality_service.get_records_page(db, rid, 100),
+    "records next page": _records_second_page,
+}
+# Branch-scoped intents; "איזה סניף הכי טוב?" compares every branch and scans by design
+QUESTIONS = [
+    "average",
+    "השבוע",
+    "מה הציון הממוצע בשבוע שעבר?",
+    "מה המנה עם הציון הגבוה ביותר?",
+    "מי השף הכי טוב?",
+    "כמה הערכות היו החודש?",
+    "מה פיזור הציונים?",
+    "מה המגמה?",
+    "daily",
+    "דוח שבועי",
+]
+for question in QUESTIONS:
+    CALLS[f"ai: {question}"] = lambda db, rid, question=question: ai_service.query_database(db, question, rid)
+
+@pytest.fixture
+def captured(engine, db):
+    # Loading the router's vocabulary reads every dish once per process; it is not part of any call
+    ai_service.query_database(db, "hello")
+    # The query stats instrumentation keeps statement text only; EXPLAIN needs the parameters too
+    statements = []
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            statements.append((statement, parameters))
+    event.listen(engine, "before_cursor_execute", capture)
+    yield statements
+    event.remove(engine, "before_cursor_execute", capture)
+
+def explain(engine, statement, parameters):
+    with engine.connect() as conn:
+        cursor = conn.connection.cursor()
+        try:
+            if engine.dialect.name == "sqlite":
+                cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+                return [row[-1] for row in cursor.fetchall()]
+            # Tiny tables make a seq scan cheapest; we only care that the index is usable
+            cursor.execute("SET enable_seqscan = off")
+            cursor.execute("EXPLAIN " + statement, parameters)
+            return [row[0] for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+def full_scans(dialect: str, plan):
+    for line in plan:
+        words = line.split()
+        if dialect == "sqlite" and words[:1] == ["SCAN"] and words[1] in SCANNED_TABLES:
+            yield line
+        if dialect != "sqlite" and any(f"Seq Scan on {table} " in line + " " for table in SCANNED_TABLES):
+            yield line
+
+@pytest.mark.parametrize("name", CALLS)
+def test_branch_analytics_use_an_index(engine, db, captured, name):
+    CALLS[name](db, RESTAURANT_ID)
+    assert captured, f"{name} issued no SELECT"
+    for statement, parameters in captured:
+        plan = explain(engine, statement, parameters)
+        assert not list(full_scans(engine.dialect.name, plan)), "\n".join([statement, *plan])
@@ -0,0 +1,54 @@
+"""Every KitchenAIService intent issues a fixed number of SQL statements,
+however many branches exist, and a rephrased question that was already
+answered does not touch the database at all."""
+import pytest
+from app.database.instrumentation import RequestQueries, current_queries
+from app.services.ai.ai_service import ai_service
+
+# question -> (expected query_type, expected statement count)
+EXPECTED = {
+    "average": ("average", 1),
+    "restaurant": ("restaurants", 1),
+    "השבוע": ("weekly", 1),
+    "hello": ("general", 0),
+    "מה הציון הממוצע בשבוע שעבר?": ("average", 1),
+    "איזה סניף הכי טוב?": ("restaurants", 1),
+    "מה המנה עם הציון הגבוה ביותר?": ("dishes", 1),
+    "מי השף הכי טוב?": ("chefs", 1),
+    "כמה הערכות היו החודש?": ("count", 1),
+    "מה פיזור הציונים?": ("distribution", 1),
+    "מה המגמה?": ("trend", 1),
+    "daily": ("daily_trend", 1),
+    "דוח שבועי": ("report", 1),
+    "monthly report": ("report", 1),
+}
+
+def count_statements(call):
+    # The same per-request counter the query stats middleware reads
+    queries = RequestQueries()
+    token = current_queries.set(queries)
+    try:
+        result = call()
+    finally:
+        current_queries.reset(token)
+    return result, queries.count
+
+@pytest.fixture
+def warm_router(db):
+    # Compiling the router's vocabulary is a one-off cost, not part of any intent
+    ai_service.query_database(db, "hello")
+    return db
+
+@pytest.mark.parametrize("question", EXPECTED)
+def test_intent_statement_count(SessionLocal, warm_router, question):
+    query_type, expected = EXPECTED[question]
+    with SessionLocal() as db:
+        result, statements = count_statements(lambda: ai_service.query_database(db, question))
+    assert (result["query_type"], statements) == (query_type, expected)
+
+@pytest.mark.parametrize("question", ["average?", "מה הממוצע?", "מה הציון הממוצע"])
+def test_rephrasing_comes_from_answer_cache(SessionLocal, warm_router, question):
+    ai_service.query_database(warm_router, "average")
+    with SessionLocal() as db:
+        result, statements = count_statements(lambda: ai_service.query_database(db, question))
+    assert (result["query_type"], statements) == ("average", 0)